@@ -0,0 +1,153 @@
+"""Сравнение WSGI и yatube.asgi при медленных клиентах.
+
+Оба варианта получают одинаковое число потоков: стек потока — основная
+статья расхода памяти воркера. В WSGI поток сам читает медленно
+приходящее тело запроса, как синхронный воркер gunicorn без буферизующего
+прокси. В ASGI тело собирает event loop, а поток занят только Django;
+цену этой буферизации показывает пик tracemalloc.
+
+Запуск из корня репозитория:
+
+    python benchmarks/asgi_vs_wsgi.py --clients 64 --threads 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+from core.asgi import ASGIHandler  # noqa: E402
+
+PATH = '/about/tech/'
+
+
+class SlowInput:
+    """wsgi.input, который отдаёт тело частями с задержкой."""
+
+    def __init__(self, chunks, delay):
+        self.chunks = list(chunks)
+        self.delay = delay
+
+    def read(self, size=-1):
+        data = BytesIO()
+        while self.chunks and (size < 0 or data.tell() < size):
+            time.sleep(self.delay)
+            data.write(self.chunks.pop(0))
+        return data.getvalue()
+
+
+def wsgi_request(application, chunks, delay, started):
+    body = SlowInput(chunks, delay)
+    # Синхронный воркер дочитывает тело до начала обработки.
+    body.read()
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': PATH,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    response = application(environ, lambda status, headers: None)
+    b''.join(response)
+    response.close()
+    return time.perf_counter() - started
+
+
+def run_wsgi(application, clients, threads, chunks, delay):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [
+            pool.submit(wsgi_request, application, chunks, delay,
+                        time.perf_counter())
+            for _ in range(clients)
+        ]
+        return [future.result() for future in futures]
+
+
+async def asgi_request(handler, chunks, delay):
+    started = time.perf_counter()
+    messages = [
+        {'type': 'http.request', 'body': chunk,
+         'more_body': number < len(chunks) - 1}
+        for number, chunk in enumerate(chunks)
+    ]
+
+    async def receive():
+        await asyncio.sleep(delay)
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': PATH, 'query_string': b'',
+        'headers': [(b'host', b'testserver')],
+    }
+    await handler(scope, receive, send)
+    return time.perf_counter() - started
+
+
+async def run_asgi_clients(handler, clients, chunks, delay):
+    return await asyncio.gather(*(
+        asgi_request(handler, chunks, delay) for _ in range(clients)))
+
+
+def run_asgi(application, clients, threads, chunks, delay):
+    handler = ASGIHandler(application, max_workers=threads)
+    return asyncio.run(run_asgi_clients(handler, clients, chunks, delay))
+
+
+def measure(name, runner, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    latencies = runner(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies.sort()
+    print(f'{name}: {len(latencies) / elapsed:8.1f} req/s, '
+          f'p50 {statistics.median(latencies) * 1000:7.1f} ms, '
+          f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms, '
+          f'peak {peak / 1024:8.0f} KiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--chunks', type=int, default=16)
+    parser.add_argument('--chunk-size', type=int, default=16 * 1024)
+    parser.add_argument('--delay', type=float, default=0.005,
+                        help='пауза клиента между частями тела, с')
+    options = parser.parse_args()
+
+    application = get_wsgi_application()
+    chunks = [b'x' * options.chunk_size] * options.chunks
+    args = (application, options.clients, options.threads, chunks,
+            options.delay)
+    print(f'{options.clients} клиентов, {options.threads} потоков, '
+          f'тело {options.chunks} x {options.chunk_size} Б '
+          f'с паузой {options.delay * 1000:.0f} мс')
+    measure('WSGI', run_wsgi, *args)
+    measure('ASGI', run_asgi, *args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Память и время на страницу ленты: модели против строк posts.rows.
+
+Для каждой страницы главной ленты выбирает посты двумя способами:
+Post с select_related('author', 'group') и FeedRows. Считает пик
+памяти при выборке (tracemalloc), память, которую держит готовая
+страница, и время. Работает на временной тестовой базе.
+
+Запуск из корня репозитория:
+
+    python benchmarks/feed_rows.py --posts 2000 --pages 100
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from posts.models import Group, Post, User  # noqa: E402
+from posts.rendering import render_text  # noqa: E402
+from posts.rows import FeedRows  # noqa: E402
+
+PER_PAGE = 10
+AUTHORS = 50
+TEXT = 'Длинный текст поста с абзацами.\n' * 60
+
+
+def models_page(number):
+    queryset = Post.objects.select_related('author', 'group')
+    return [(post.excerpt, post.author.get_full_name(), post.image)
+            for post in queryset[number * PER_PAGE:(number + 1) * PER_PAGE]]
+
+
+def rows_page(number):
+    rows = FeedRows(Post.objects.all())
+    return [(post.excerpt, post.author.get_full_name(), post.image)
+            for post in rows[number * PER_PAGE:(number + 1) * PER_PAGE]]
+
+
+def measure(name, page, pages):
+    page(0)
+    gc.collect()
+    started = time.perf_counter()
+    for number in range(pages):
+        page(number)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    peak = kept = 0
+    for number in range(pages):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = page(number)
+        current, top = tracemalloc.get_traced_memory()
+        peak += top - before
+        kept += current - before
+        del result
+    tracemalloc.stop()
+    print(f'{name:>7}: пик {peak / pages / 1024:6.1f} КБ, '
+          f'страница держит {kept / pages / 1024:6.1f} КБ, '
+          f'{elapsed / pages * 1000:5.2f} мс')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--pages', type=int, default=100)
+    options = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        User.objects.bulk_create([
+            User(username=f'author{number}', first_name='Имя',
+                 last_name=f'Фамилия {number}', password='!' * 80)
+            for number in range(AUTHORS)
+        ])
+        authors = list(User.objects.all())
+        group = Group.objects.create(title='Группа', slug='group')
+        text_html, excerpt_html = render_text(TEXT)
+        Post.objects.bulk_create([
+            Post(text=TEXT, text_html=text_html, excerpt_html=excerpt_html,
+                 author=authors[number % AUTHORS], group=group)
+            for number in range(options.posts)
+        ])
+        pages = min(options.pages, options.posts // PER_PAGE)
+        measure('модели', models_page, pages)
+        measure('строки', rows_page, pages)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Запросы к базе на страницу вошедшего пользователя для разных сессий.
+
+Сравнивает стандартные сессии в базе с core.sessions: для каждой
+страницы считает запросы всего и запросы к django_session. Работает на
+временной тестовой базе.
+
+Запуск из корня репозитория:
+
+    python benchmarks/session_queries.py --requests 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext, override_settings, setup_test_environment,
+)
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'core.sessions': 'core.sessions',
+}
+PAGES = ['/follow/', '/create/', '/']
+
+
+def measure(name, engine, user, requests):
+    with override_settings(SESSION_ENGINE=engine):
+        client = Client()
+        client.force_login(user)
+        total = session = 0
+        started = time.perf_counter()
+        for number in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                client.get(PAGES[number % len(PAGES)])
+            total += len(queries)
+            session += sum('django_session' in query['sql']
+                           for query in queries)
+        elapsed = time.perf_counter() - started
+    print(f'{name:>14}: {total / requests:5.2f} запросов на страницу, '
+          f'из них к django_session {session / requests:4.2f}, '
+          f'{elapsed / requests * 1000:6.1f} мс')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50)
+    options = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = get_user_model().objects.create_user(username='bench')
+        for name, engine in ENGINES.items():
+            measure(name, engine, user, options.requests)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,11 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def temp_media(tmp_path_factory):
+    # загрузки и база миниатюр не должны оставаться в дереве проекта
+    from core.testrunner import temp_media_settings
+    with temp_media_settings(str(tmp_path_factory.mktemp('yatube'))):
+        yield
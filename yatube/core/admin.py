@@ -0,0 +1,43 @@
+from django.contrib import admin
+
+from . import tasks
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'task',
+        'priority',
+        'status',
+        'attempts',
+        'run_at',
+        'started',
+        'finished',
+        'worker',
+    )
+    list_filter = ('status', 'priority', 'task')
+    search_fields = ('task', 'last_error')
+    date_hierarchy = 'created'
+    readonly_fields = ('created', 'started', 'finished', 'worker',
+                       'lease_until', 'last_error')
+    actions = ('retry_failed',)
+    # над списком: глубина очереди и задержки за последний час
+    change_list_template = 'admin/core/job/change_list.html'
+
+    def changelist_view(self, request, extra_context=None):
+        stats = tasks.queue_stats()
+        statuses = dict(Job.STATUSES)
+        for row in stats['depth']:
+            row['status'] = statuses[row['status']]
+        for key in ('oldest_wait', 'average_wait', 'average_run'):
+            if stats[key] is not None:
+                stats[key] = f'{stats[key].total_seconds():.1f} с'
+        return super().changelist_view(
+            request, dict(extra_context or {}, stats=stats))
+
+    def retry_failed(self, request, queryset):
+        count = tasks.retry(queryset)
+        self.message_user(request, f'Возвращено в очередь задач: {count}')
+    retry_failed.short_description = 'Повторить упавшие задачи'
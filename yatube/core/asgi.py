@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+
+from .events import ASYNC_EVENTS
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_BUFFER = 16
+
+
+class ResponseAborted(Exception):
+    """Приложение упало, когда часть тела ответа уже ушла клиенту."""
+
+
+class ASGIHandler:
+    """ASGI-приложение поверх WSGI-обработчика Django.
+
+    Django 2.2 не умеет ни ASGI, ни асинхронные view, поэтому вся работа
+    Django, включая ORM, идёт в ограниченном пуле потоков, а event loop
+    только принимает и отправляет байты. Тело запроса (загрузка картинки
+    в post_create и post_edit) читается в loop во временный файл, и поток
+    занимается только когда запрос пришёл целиком. Медленный клиент
+    держит память под ответ, но не поток.
+
+    Ответ со stream_async (core.events.EventStreamResponse) поток
+    только создаёт: права и подписку проверяет обычная view, а сами
+    события отдаёт event loop, пока клиент не отключится.
+    """
+
+    def __init__(self, application, max_workers=None):
+        self.application = application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.ASGI_THREADS,
+            thread_name_prefix='yatube-asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        body = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        environ = build_environ(scope, body)
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=RESPONSE_BUFFER)
+        worker = loop.run_in_executor(
+            self.executor, self.respond, environ, loop, queue)
+        try:
+            await self.send_response(queue, receive, send)
+        except ResponseAborted:
+            # Поток уже заканчивает: дожидаемся его и отдаём ошибку
+            # серверу, который закроет соединение.
+            await self.drain(queue, worker)
+            body.close()
+            raise
+        except BaseException:
+            # Клиент ушёл: разбираем очередь, иначе поток повиснет на put().
+            asyncio.ensure_future(self.drain(queue, worker))
+            raise
+        await worker
+        body.close()
+
+    async def send_response(self, queue, receive, send):
+        started = False
+        while True:
+            kind, payload = await queue.get()
+            if kind == 'start':
+                started = True
+                await send({'type': 'http.response.start', **payload})
+            elif kind == 'body':
+                await send({'type': 'http.response.body', 'body': payload,
+                            'more_body': True})
+            elif kind == 'stream':
+                await self.send_stream(payload, receive, send)
+            elif kind == 'error':
+                if started:
+                    # Заголовки уже ушли: не завершаем тело, а рвём
+                    # соединение, чтобы клиент и прокси не приняли
+                    # обрезанный ответ за целый.
+                    raise ResponseAborted
+                await send({
+                    'type': 'http.response.start',
+                    'status': 500,
+                    'headers': [(b'content-type', b'text/plain')],
+                })
+                started = True
+            elif kind == 'end':
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+
+    @staticmethod
+    async def send_stream(response, receive, send):
+        async def disconnected():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        client_gone = asyncio.ensure_future(disconnected())
+        chunks = response.stream_async()
+        try:
+            while True:
+                chunk = asyncio.ensure_future(chunks.__anext__())
+                await asyncio.wait([chunk, client_gone],
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if not chunk.done():
+                    chunk.cancel()
+                    await asyncio.wait([chunk])
+                    break
+                try:
+                    body = chunk.result()
+                except StopAsyncIteration:
+                    break
+                await send({'type': 'http.response.body', 'body': body,
+                            'more_body': True})
+        finally:
+            client_gone.cancel()
+            await chunks.aclose()
+
+    @staticmethod
+    async def drain(queue, worker):
+        while not worker.done():
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait([getter, worker],
+                               return_when=asyncio.FIRST_COMPLETED)
+            getter.cancel()
+
+    def respond(self, environ, loop, queue):
+        """Выполняет WSGI-приложение целиком в одном потоке пула.
+
+        Вызов, итерация и close() ответа идут в одном потоке, чтобы
+        соединение с базой, открытое на request_started, закрылось
+        на request_finished в том же потоке.
+        """
+        def put(kind, payload=None):
+            asyncio.run_coroutine_threadsafe(
+                queue.put((kind, payload)), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            put('start', {
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'),
+                             value.encode('latin-1'))
+                            for name, value in headers],
+            })
+
+        try:
+            iterable = self.application(environ, start_response)
+            if hasattr(iterable, 'stream_async'):
+                # Запрос для Django закончен (request_finished закроет
+                # соединение с базой), поток событий ведёт loop.
+                iterable.close()
+                put('stream', iterable)
+                return
+            try:
+                for chunk in iterable:
+                    if chunk:
+                        put('body', chunk)
+            finally:
+                if hasattr(iterable, 'close'):
+                    iterable.close()
+        except Exception:
+            logger.exception('Ошибка при обработке %s',
+                             environ.get('PATH_INFO'))
+            put('error')
+        finally:
+            put('end')
+
+
+def build_environ(scope, body):
+    script_name = scope.get('root_path', '')
+    path = scope['path']
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path,
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'CONTENT_LENGTH': str(body.seek(0, 2)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        ASYNC_EVENTS: True,
+    }
+    body.seek(0)
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-length':
+            continue
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        if key in environ:
+            value = f'{environ[key]},{value}'
+        environ[key] = value
+    return environ
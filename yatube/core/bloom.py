@@ -0,0 +1,70 @@
+"""Фильтр Блума: приблизительное множество фиксированного размера.
+
+Отвечает «точно не было» или «вероятно было» с долей ложных
+срабатываний около error_rate, пока в нём не больше capacity ключей.
+Память не растёт с числом ключей: 100 000 ключей при 1 % ошибок
+занимают около 120 КБ.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Двойное хэширование: k позиций из двух половин одного дайджеста.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + number * step) % self.size
+                for number in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+    def add(self, key):
+        """Добавляет ключ; False, если он, вероятно, уже был."""
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        return added
+
+
+class RotatingBloomFilter:
+    """Ключи за последние window..2*window секунд.
+
+    Держит два фильтра и раз в window секунд выбрасывает старший, так
+    что память ограничена, а ключ помнится не меньше window секунд.
+    """
+
+    def __init__(self, capacity, window, error_rate=0.01):
+        self.capacity = capacity
+        self.window = window
+        self.error_rate = error_rate
+        self.started = None
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = BloomFilter(capacity, error_rate)
+
+    def add(self, key, now):
+        """Добавляет ключ; False, если он, вероятно, уже встречался."""
+        if self.started is None:
+            self.started = now
+        elif now - self.started >= self.window:
+            fresh = now - self.started < 2 * self.window
+            self.previous = self.current if fresh else BloomFilter(
+                self.capacity, self.error_rate)
+            self.current = BloomFilter(self.capacity, self.error_rate)
+            self.started = now
+        if key in self.previous:
+            self.current.add(key)
+            return False
+        return self.current.add(key)
@@ -0,0 +1,184 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+SUBSCRIPTION_BUFFER = 100
+SSE_RETRY_MS = 5000
+SSE_HEARTBEAT = 15
+# Под WSGI поток событий держит поток сервера, поэтому живёт недолго;
+# EventSource сам переподключится через retry. Под core.asgi поток
+# обслуживает event loop и может жить дольше.
+SSE_STREAM_TIMEOUT = 60
+SSE_ASYNC_STREAM_TIMEOUT = 30 * 60
+# Ключ environ, которым core.asgi отмечает свои запросы.
+ASYNC_EVENTS = 'yatube.async_events'
+
+_broker = None
+
+
+class Subscription:
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self.messages = queue.Queue(maxsize=SUBSCRIPTION_BUFFER)
+        # (loop, asyncio.Event) читателя из event loop, см. aget().
+        self._waiter = None
+
+    def put(self, message):
+        try:
+            self.messages.put_nowait(message)
+        except queue.Full:
+            # Клиент не успевает читать: лучше потерять событие,
+            # чем копить память. Страница всё равно покажет его
+            # после перезагрузки.
+            return
+        waiter = self._waiter
+        if waiter is not None:
+            loop, ready = waiter
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                # Loop уже закрыт, читать некому.
+                pass
+
+    def get(self, timeout):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout):
+        """Как get(), но ждёт в event loop, не занимая поток."""
+        if self._waiter is None:
+            self._waiter = (asyncio.get_running_loop(), asyncio.Event())
+        ready = self._waiter[1]
+        while True:
+            ready.clear()
+            try:
+                return self.messages.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                await asyncio.wait_for(ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """Pub/sub в памяти процесса.
+
+    Видит только подписчиков своего процесса, поэтому годится для
+    runserver, одного воркера ASGI и тестов. Для нескольких процессов
+    EVENTS_BROKER указывает на брокер с тем же интерфейсом поверх
+    общего канала (например, Redis pub/sub).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[channel]
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put((event, data))
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def publish(channels, event, data):
+    """Отправляет событие подписчикам после коммита транзакции."""
+    def send():
+        broker = get_broker()
+        for channel in channels:
+            broker.publish(channel, event, data)
+
+    transaction.on_commit(send)
+
+
+def events_supported(request):
+    """Можно ли держать поток событий, не занимая поток сервера.
+
+    Так умеет только core.asgi. Под WSGI каждая открытая вкладка
+    держала бы поток или sync-воркер, поэтому страницы не открывают
+    EventSource, а view потоков отвечают 204.
+    """
+    return bool(request.META.get(ASYNC_EVENTS))
+
+
+def _format(event, data):
+    lines = ''.join(f'data: {line}\n' for line in data.splitlines())
+    return f'event: {event}\n{lines}\n'
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """Поток server-sent events из подписки на каналы брокера.
+
+    Под core.asgi обработчик видит stream_async и отдаёт поток из event
+    loop, сразу освобождая поток пула. Синхронный генератор остаётся
+    для тестового клиента и других WSGI-обработчиков.
+    """
+
+    def __init__(self, subscription):
+        self.subscription = subscription
+        super().__init__(self._stream(), content_type='text/event-stream')
+        self['Cache-Control'] = 'no-cache'
+        self['X-Accel-Buffering'] = 'no'
+
+    def _stream(self):
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'
+            deadline = time.monotonic() + SSE_STREAM_TIMEOUT
+            while time.monotonic() < deadline:
+                message = self.subscription.get(timeout=SSE_HEARTBEAT)
+                if message is None:
+                    yield ': ping\n\n'
+                else:
+                    yield _format(*message)
+        finally:
+            self.subscription.close()
+
+    async def stream_async(self):
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'.encode()
+            deadline = time.monotonic() + SSE_ASYNC_STREAM_TIMEOUT
+            while time.monotonic() < deadline:
+                message = await self.subscription.aget(SSE_HEARTBEAT)
+                if message is None:
+                    yield b': ping\n\n'
+                else:
+                    yield _format(*message).encode()
+        finally:
+            self.subscription.close()
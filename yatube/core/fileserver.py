@@ -0,0 +1,160 @@
+import mimetypes
+import os
+import re
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+DEFAULT_MAX_AGE = 60
+# хеш ManifestStaticFilesStorage, sha256 картинок постов и ключи sorl
+HASHED_NAME = re.compile(r'(\.[0-9a-f]{12}\.|/[0-9a-f]{32,64}\.)')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _status(code):
+    return f'{code.value} {code.phrase}'
+
+
+def _read(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+class FileServer:
+    """WSGI-обёртка, которая сама отдаёт статику и медиа.
+
+    Нужна для локального запуска без nginx: поддерживает заранее
+    сжатые копии, условные запросы, Range и wsgi.file_wrapper
+    (sendfile у gunicorn и uwsgi). Остальные запросы уходят в Django.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.mounts = [
+            (settings.STATIC_URL, settings.STATIC_ROOT),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT),
+        ]
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        for prefix, root in self.mounts:
+            if root and path.startswith(prefix):
+                return self.serve(
+                    environ, start_response, root, path[len(prefix):])
+        return self.application(environ, start_response)
+
+    def serve(self, environ, start_response, root, name):
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response(_status(HTTPStatus.METHOD_NOT_ALLOWED),
+                           [('Allow', 'GET, HEAD')])
+            return []
+        path = self.find(root, name)
+        if path is None:
+            start_response(_status(HTTPStatus.NOT_FOUND),
+                           [('Content-Type', 'text/plain')])
+            return [b'Not Found']
+
+        content_type, _ = mimetypes.guess_type(path)
+        range_header = environ.get('HTTP_RANGE')
+        encoding = None
+        if not range_header:
+            path, encoding = self.negotiate(environ, path)
+        stat = os.stat(path)
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Last-Modified', http_date(stat.st_mtime)),
+            ('ETag', etag),
+            ('Cache-Control', self.cache_control(name)),
+            ('Vary', 'Accept-Encoding'),
+            ('Accept-Ranges', 'bytes'),
+        ]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        if self.not_modified(environ, etag, stat.st_mtime):
+            start_response(_status(HTTPStatus.NOT_MODIFIED), headers)
+            return []
+        if range_header:
+            return self.serve_range(
+                environ, start_response, path, stat.st_size, range_header,
+                headers)
+
+        headers.append(('Content-Length', str(stat.st_size)))
+        start_response(_status(HTTPStatus.OK), headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(file, CHUNK_SIZE)
+        return _read(file, 0, stat.st_size)
+
+    @staticmethod
+    def find(root, name):
+        try:
+            path = safe_join(root, name)
+        except SuspiciousFileOperation:
+            return None
+        return path if os.path.isfile(path) else None
+
+    @staticmethod
+    def negotiate(environ, path):
+        accepted = environ.get('HTTP_ACCEPT_ENCODING', '')
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(path + suffix):
+                return path + suffix, encoding
+        return path, None
+
+    @staticmethod
+    def cache_control(name):
+        if HASHED_NAME.search('/' + name):
+            return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        return f'public, max-age={DEFAULT_MAX_AGE}'
+
+    def serve_range(self, environ, start_response, path, size, value,
+                    headers):
+        match = RANGE.match(value.strip())
+        start = end = None
+        if match and any(match.groups()):
+            first, last = match.groups()
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            else:
+                start = max(size - int(last), 0)
+                end = size - 1
+        if start is None or start > end:
+            headers.append(('Content-Range', f'bytes */{size}'))
+            start_response(
+                _status(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE), headers)
+            return []
+        length = end - start + 1
+        headers += [
+            ('Content-Range', f'bytes {start}-{end}/{size}'),
+            ('Content-Length', str(length)),
+        ]
+        start_response(_status(HTTPStatus.PARTIAL_CONTENT), headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        return _read(open(path, 'rb'), start, length)
+
+    @staticmethod
+    def not_modified(environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        since = parse_http_date_safe(
+            environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return since is not None and int(mtime) <= since
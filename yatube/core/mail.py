@@ -0,0 +1,115 @@
+"""Очередь исходящих писем.
+
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend' только складывает письма
+в таблицу QueuedEmail и ставит фоновую задачу, поэтому send_mail,
+PasswordResetView и рассылки не ждут почтовый сервер в потоке запроса.
+send_queued забирает письма пачками по MAIL_BATCH и отправляет каждую
+пачку через одно соединение MAIL_QUEUE_BACKEND. Неудачные письма
+повторяются с растущей паузой, не больше MAX_ATTEMPTS раз. Если
+фоновая задача потерялась, очередь дочищает manage.py send_queued_mail.
+"""
+import logging
+import pickle
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from core.tasks import PRIORITY_HIGH, schedule
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+MAIL_BATCH = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)
+# Занятое письмо вернётся в очередь, если воркер за это время не
+# отчитался об отправке.
+CLAIM_TIMEOUT = timedelta(minutes=10)
+KEEP_SENT = timedelta(days=7)
+
+
+def queue_messages(messages):
+    """Кладёт EmailMessage в очередь одним INSERT и запускает отправку."""
+    rows = []
+    for message in messages:
+        message.connection = None
+        rows.append(QueuedEmail(message=pickle.dumps(message)))
+    QueuedEmail.objects.bulk_create(rows)
+    if rows:
+        schedule(send_queued, priority=PRIORITY_HIGH)
+    return len(rows)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        return queue_messages(email_messages)
+
+
+def _claim(batch_size):
+    now = timezone.now()
+    pending = QueuedEmail.objects.filter(
+        sent__isnull=True, attempts__lt=MAX_ATTEMPTS,
+        next_attempt__lte=now).order_by('pk')
+    pks = list(pending.values_list('pk', flat=True)[:batch_size])
+    if not pks:
+        return []
+    claim = uuid.uuid4()
+    # Из уже занятых другим воркером писем условие next_attempt__lte
+    # ничего не отдаст.
+    pending.filter(pk__in=pks).update(
+        claim=claim, next_attempt=now + CLAIM_TIMEOUT)
+    return list(QueuedEmail.objects.filter(claim=claim).order_by('pk'))
+
+
+def send_batch(batch_size=MAIL_BATCH):
+    """Отправляет одну пачку писем через одно соединение.
+
+    Возвращает число писем в пачке; 0 — очередь пуста.
+    """
+    rows = _claim(batch_size)
+    if not rows:
+        return 0
+    sent, failed = [], []
+    connection = get_connection(settings.MAIL_QUEUE_BACKEND)
+    try:
+        connection.open()
+        for row in rows:
+            try:
+                message = pickle.loads(row.message)
+                message.connection = connection
+                connection.send_messages([message])
+            except Exception as error:
+                row.last_error = f'{type(error).__name__}: {error}'
+                failed.append(row)
+            else:
+                sent.append(row.pk)
+    finally:
+        connection.close()
+    now = timezone.now()
+    QueuedEmail.objects.filter(pk__in=sent).update(sent=now, claim=None)
+    for row in failed:
+        row.attempts += 1
+        row.claim = None
+        row.next_attempt = now + RETRY_DELAY * 2 ** (row.attempts - 1)
+        logger.warning('Письмо %s не отправлено (попытка %s): %s',
+                       row.pk, row.attempts, row.last_error)
+    QueuedEmail.objects.bulk_update(
+        failed, ['attempts', 'claim', 'next_attempt', 'last_error'])
+    return len(rows)
+
+
+def send_queued(batch_size=MAIL_BATCH):
+    """Отправляет всё, что готово к отправке; возвращает число писем."""
+    total = 0
+    while True:
+        count = send_batch(batch_size)
+        if not count:
+            break
+        total += count
+    QueuedEmail.objects.filter(
+        sent__lt=timezone.now() - KEEP_SENT).delete()
+    return total
@@ -0,0 +1,76 @@
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import tasks
+
+logger = logging.getLogger('core.tasks')
+
+# Сколько ждать, пока воркеры доделают текущие задачи при остановке;
+# задачу убитого воркера подхватят после конца аренды.
+SHUTDOWN_TIMEOUT = 60
+
+
+def _worker(stop, poll):
+    # Ctrl+C приходит всей группе процессов: воркер дорабатывает
+    # текущую задачу и выходит по событию stop от родителя.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    tasks.work(stop, poll)
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул процессов, выполняющих фоновые задачи core.Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.TASKS_WORKERS,
+            help='число процессов-воркеров')
+        parser.add_argument(
+            '--poll', type=float, default=tasks.POLL_INTERVAL,
+            help='пауза между опросами пустой очереди, секунд')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='выполнить готовые задачи в этом процессе и выйти')
+
+    def handle(self, *args, processes, poll, once, **options):
+        if once:
+            done = tasks.run_pending()
+            tasks.cleanup()
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        stop = multiprocessing.Event()
+        # Обработчик сигнала только ставит флаг: трогать из него
+        # разделяемое событие небезопасно.
+        signals = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda signum, frame: signals.append(signum))
+        # Дочерние процессы не должны унаследовать соединения родителя.
+        connections.close_all()
+        pool = [self._start(stop, poll) for _ in range(processes)]
+        self.stdout.write(f'Запущено воркеров: {processes}')
+        while not signals:
+            time.sleep(1)
+            for number, process in enumerate(pool):
+                if not process.is_alive():
+                    logger.error('Воркер %s завершился с кодом %s, '
+                                 'перезапускаю', process.pid,
+                                 process.exitcode)
+                    pool[number] = self._start(stop, poll)
+        stop.set()
+        for process in pool:
+            process.join(SHUTDOWN_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+        self.stdout.write('Воркеры остановлены')
+
+    def _start(self, stop, poll):
+        process = multiprocessing.Process(
+            target=_worker, args=(stop, poll), daemon=True)
+        process.start()
+        return process
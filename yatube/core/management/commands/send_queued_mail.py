@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.mail import MAIL_BATCH, send_queued
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками через одно соединение.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=MAIL_BATCH,
+            help='писем на одно соединение с почтовым сервером')
+
+    def handle(self, *args, batch, **options):
+        sent = send_queued(batch)
+        self.stdout.write(f'Обработано писем: {sent}')
@@ -0,0 +1,76 @@
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedEmail(models.Model):
+    """Письмо в очереди core.mail.
+
+    Пока sent пусто, письмо ждёт отправки. claim и next_attempt
+    занимает воркер, который его отправляет, чтобы второй воркер не
+    отправил то же письмо.
+    """
+    message = models.BinaryField('Письмо')
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка', default=timezone.now)
+    claim = models.UUIDField('Захвачено воркером', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sent', 'next_attempt'],
+                         name='queued_email_pending_idx'),
+        ]
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+
+
+class Job(models.Model):
+    """Фоновая задача core.tasks.
+
+    Воркер атомарно захватывает готовую задачу с наибольшим priority
+    и продлевает её аренду lease_until; задача с истёкшей арендой
+    (упавший воркер) снова доступна для захвата.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ждёт'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField('Задача', max_length=200)
+    args = models.TextField('Аргументы', default='[]')
+    kwargs = models.TextField('Именованные аргументы', default='{}')
+    priority = models.SmallIntegerField(
+        'Приоритет', default=0, help_text='Больший выполняется раньше')
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=PENDING)
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    lease_until = models.DateTimeField(
+        'Аренда до', null=True, blank=True)
+    worker = models.CharField('Воркер', max_length=100, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=5)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    started = models.DateTimeField('Начата', null=True, blank=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_at'],
+                         name='job_ready_idx'),
+        ]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,122 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Больше этого числа строк отфильтрованную выборку не пересчитываем.
+COUNT_LIMIT = 10000
+
+
+def _sqlite_rows(cursor, table):
+    # Первое число в stat — строк в таблице на момент ANALYZE.
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+    counts = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+    return max(counts) if counts else None
+
+
+def estimate_count(queryset):
+    """Число строк таблицы без фильтров, точное или оценка, либо None.
+
+    Таблица до COUNT_LIMIT строк считается точно. Для большей берётся
+    статистика, которую обновляет analyze: sqlite_stat1 в SQLite,
+    reltuples в PostgreSQL. Без статистики возвращается None.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    exact = queryset.order_by()[:COUNT_LIMIT + 1].count()
+    if exact <= COUNT_LIMIT:
+        return exact
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            return _sqlite_rows(cursor, model._meta.db_table)
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+            # -1: таблицу ещё ни разу не анализировали.
+            return row[0] if row and row[0] >= 0 else None
+    return None
+
+
+def analyze(*models, using='default'):
+    """Обновляет статистику таблиц после массовых вставок и удалений."""
+    connection = connections[using]
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(
+                'ANALYZE ' + connection.ops.quote_name(model._meta.db_table))
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для очень больших таблиц.
+
+    Число строк без фильтров берётся из estimate_count, а с фильтрами
+    считается не дальше COUNT_LIMIT. Страница выбирается в два шага
+    (deferred join): сначала первичные ключи по индексу сортировки,
+    затем полные строки только этой страницы. Так OFFSET проходит по
+    узкому индексу, а не по строкам с JOIN на автора и группу. Страница
+    остаётся QuerySet, поэтому list_editable админки работает как
+    прежде.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where and not queryset.query.distinct:
+            estimate = estimate_count(queryset)
+            if estimate is not None:
+                return estimate
+        return queryset.order_by()[:COUNT_LIMIT].count()
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        pks = list(self.object_list.values_list('pk', flat=True)[bottom:top])
+        return self._get_page(self.object_list.filter(pk__in=pks),
+                              number, self)
+
+
+class QuerySetChain:
+    """Несколько queryset подряд как один список для Paginator.
+
+    Каждый queryset должен целиком идти после предыдущего в общем
+    порядке сортировки. Срез читает только те queryset, в которые он
+    попадает, а count() считает их по одному разу. Уже известные числа
+    строк передаются в counts, тогда COUNT не выполняется вовсе.
+    """
+
+    def __init__(self, *querysets, counts=None):
+        self.querysets = querysets
+        if counts is not None:
+            self.__dict__['counts'] = list(counts)
+
+    @cached_property
+    def counts(self):
+        return [queryset.count() for queryset in self.querysets]
+
+    def count(self):
+        return sum(self.counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        items = []
+        for queryset, count in zip(self.querysets, self.counts):
+            if start < count and stop > 0:
+                items.extend(queryset[max(start, 0):min(stop, count)])
+            start -= count
+            stop -= count
+        return items
@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from http import HTTPStatus
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+MAX_BLOCKED = 10000
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+# Клиенты, уже упёршиеся в лимит: до истечения Retry-After их запросы
+# отклоняются без обращения к кэшу.
+_blocked = {}
+
+
+class Rule:
+    """Правило вида 'user:10/m' или 'ip:100/h'.
+
+    Ведро ёмкостью limit наполняется со скоростью limit за period.
+    """
+
+    def __init__(self, spec):
+        scope, rate = spec.split(':')
+        limit, period = rate.split('/')
+        if scope not in ('user', 'ip'):
+            raise ValueError(f'Неизвестная область лимита {scope}')
+        self.scope = scope
+        self.limit = int(limit)
+        self.period = PERIODS[period]
+
+    def identity(self, request):
+        if self.scope == 'ip':
+            return request.META.get('REMOTE_ADDR', '')
+        if request.user.is_authenticated:
+            return str(request.user.pk)
+        return None
+
+
+def _count(key, timeout):
+    cache = caches[settings.RATELIMIT_CACHE]
+    # add и incr атомарны в общих кэшах (memcached, redis), поэтому
+    # параллельные воркеры не теряют обращения.
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключ истёк между add и incr.
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def _previous(key):
+    return caches[settings.RATELIMIT_CACHE].get(key, 0)
+
+
+def hit(name, rule, identity, now=None):
+    """Учитывает обращение и возвращает, через сколько секунд повторить.
+
+    Ведро хранится как два счётчика соседних окон: уровень ведра равен
+    счётчику текущего окна плюс доля предыдущего, ещё не «вытекшая» к
+    этому моменту. Так нужны только атомарные add/incr без
+    compare-and-set, которого нет в API кэша Django. Возвращает 0, если
+    обращение укладывается в лимит.
+    """
+    now = time.time() if now is None else now
+    window, offset = divmod(now, rule.period)
+    prefix = (f'ratelimit:{name}:{rule.scope}:{rule.period}:'
+              f'{identity}')
+    current = _count(f'{prefix}:{int(window)}', rule.period * 2)
+    previous = _previous(f'{prefix}:{int(window) - 1}')
+    leak = offset / rule.period
+    level = previous * (1 - leak) + current
+    if level <= rule.limit:
+        return 0
+    # Ждём, пока из предыдущего окна вытечет лишнее, или до конца окна.
+    if previous:
+        wait = (level - rule.limit) / previous * rule.period
+    else:
+        wait = rule.period - offset
+    return max(1, ceil(min(wait, rule.period - offset)))
+
+
+def record(name, outcome):
+    with _metrics_lock:
+        _metrics[name, outcome] += 1
+
+
+def get_metrics():
+    """Возвращает счётчики {(url name, 'allowed'|'limited'): число}."""
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'core/429.html',
+                      status=HTTPStatus.TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def throttle(*specs, methods=UNSAFE_METHODS):
+    """Ограничивает частоту запросов к view.
+
+    Вёдра ведутся отдельно для каждого имени URL. Правила проверяются
+    по порядку; учитываются только запросы с методами из methods.
+    """
+    rules = [Rule(spec) for spec in specs]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (not settings.RATELIMIT_ENABLE
+                    or request.method not in methods):
+                return view(request, *args, **kwargs)
+            name = request.resolver_match.view_name
+            now = time.time()
+            for rule in rules:
+                identity = rule.identity(request)
+                if identity is None:
+                    continue
+                key = (name, rule.scope, identity)
+                until = _blocked.get(key)
+                if until is not None:
+                    if until > now:
+                        record(name, 'limited')
+                        return too_many_requests(request, ceil(until - now))
+                    _blocked.pop(key, None)
+                retry_after = hit(name, rule, identity, now)
+                if retry_after:
+                    if len(_blocked) >= MAX_BLOCKED:
+                        _blocked.clear()
+                    _blocked[key] = now + retry_after
+                    record(name, 'limited')
+                    logger.warning('Лимит %s для %s %s превышен',
+                                   name, rule.scope, identity)
+                    return too_many_requests(request, retry_after)
+            record(name, 'allowed')
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def reset():
+    """Сбрасывает локальные блокировки и метрики процесса."""
+    _blocked.clear()
+    with _metrics_lock:
+        _metrics.clear()
@@ -0,0 +1,100 @@
+"""Сессии без похода в базу на каждый запрос.
+
+Небольшая сессия (у вошедшего пользователя это id, backend и хэш
+пароля) целиком хранится в подписанной cookie, как в
+django.contrib.sessions.backends.signed_cookies, и читается без
+обращений к базе и кэшу. Если данные не помещаются в SIGNED_MAX_LENGTH,
+сессия переезжает в cached_db: запись идёт в базу и сразу в кэш,
+чтение идёт из кэша.
+
+Подписанную сессию нельзя отозвать на сервере: выход очищает cookie
+только у этого клиента. Смена пароля по-прежнему завершает все сессии,
+потому что в сессии лежит хэш пароля.
+
+Подключение: SESSION_ENGINE = 'core.sessions'.
+"""
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.core import signing
+from django.utils import timezone
+
+SIGNED_SALT = 'core.sessions'
+# Ключ сессии уходит в cookie целиком; браузеры ограничивают её 4 КБ.
+SIGNED_MAX_LENGTH = 2048
+CLEANUP_BATCH = 500
+
+
+def is_signed(session_key):
+    # Ключи из базы состоят из [a-z0-9], в подписанной строке есть ':'.
+    return bool(session_key) and ':' in session_key
+
+
+class SessionStore(cached_db.SessionStore):
+    def load(self):
+        if not is_signed(self.session_key):
+            return super().load()
+        try:
+            return signing.loads(
+                self.session_key,
+                serializer=self.serializer,
+                max_age=settings.SESSION_COOKIE_AGE,
+                salt=SIGNED_SALT,
+            )
+        except Exception:
+            # Подпись не сошлась или истекла: начинаем пустую сессию.
+            self._session_key = None
+            return {}
+
+    def create(self):
+        # Новая сессия получает ключ при сохранении, когда станет
+        # известно, поместится ли она в cookie.
+        self._session_key = None
+        self._session_cache = {}
+        self.modified = True
+
+    def save(self, must_create=False):
+        signed = signing.dumps(
+            self._get_session(no_load=must_create),
+            compress=True,
+            salt=SIGNED_SALT,
+            serializer=self.serializer,
+        )
+        if len(signed) <= SIGNED_MAX_LENGTH:
+            previous = self.session_key
+            self._session_key = signed
+            self.modified = True
+            if previous and not is_signed(previous):
+                # Сессия похудела и уехала в cookie: серверная копия
+                # больше не нужна.
+                super().delete(previous)
+            return
+        if self.session_key is None or is_signed(self.session_key):
+            # create() базы выдаёт свободный ключ и снова вызывает save().
+            return super().create()
+        return super().save(must_create)
+
+    def exists(self, session_key):
+        if is_signed(session_key):
+            return False
+        return super().exists(session_key)
+
+    def delete(self, session_key=None):
+        key = self.session_key if session_key is None else session_key
+        if not is_signed(key):
+            return super().delete(session_key)
+        if session_key is None:
+            self._session_key = None
+            self._session_cache = {}
+            self.modified = True
+
+    @classmethod
+    def clear_expired(cls):
+        """Удаляет истёкшие сессии пачками, не блокируя таблицу надолго."""
+        model = cls.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+        while True:
+            keys = list(
+                expired.values_list('pk', flat=True)[:CLEANUP_BATCH])
+            if not keys:
+                return
+            model.objects.filter(pk__in=keys).delete()
@@ -0,0 +1,55 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.txt', '.html', '.xml', '.json',
+    '.ico', '.ttf', '.eot', '.otf',
+)
+MIN_COMPRESS_SIZE = 256
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и заранее сжатыми копиями.
+
+    Рядом с каждым текстовым файлом collectstatic кладёт .gz и,
+    если установлен пакет brotli, .br. Их отдаёт core.fileserver
+    или внешний веб-сервер (gzip_static, brotli_static).
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = []
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run=dry_run, **options):
+            if isinstance(hashed_name, str):
+                hashed_names.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in hashed_names:
+            if hashed_name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compress in _compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
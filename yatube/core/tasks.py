@@ -0,0 +1,253 @@
+"""Фоновые задачи в таблице core.Job.
+
+enqueue и schedule записывают задачу строкой Job в текущей транзакции,
+поэтому воркер увидит её только после коммита, а откат запроса
+отменяет и задачу. Воркеры (manage.py runworkers) захватывают готовую
+задачу одним UPDATE ... RETURNING: статус, аренду и счётчик попыток
+ставит тот же запрос, который выбирает задачу с наибольшим приоритетом,
+так что два воркера не возьмут одну строку. Упавшая задача повторяется
+через RETRY_DELAY * 2 ** (попытка - 1), пока не кончатся max_attempts;
+задача упавшего воркера снова доступна, когда истечёт аренда.
+
+Аргументы задачи сериализуются в JSON: передавайте id и строки, а не
+объекты моделей, задача сама читает свежие данные из базы. В режиме
+TASKS_ALWAYS_EAGER задача выполняется сразу, в вызывающем потоке.
+"""
+import json
+import logging
+import os
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(seconds=30)
+# Задача, которую воркер не завершил за это время, считается брошенной.
+LEASE_TIMEOUT = timedelta(minutes=30)
+KEEP_DONE = timedelta(days=7)
+POLL_INTERVAL = 1.0
+CLEANUP_INTERVAL = 60
+STATS_WINDOW = timedelta(hours=1)
+
+
+def task_path(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def schedule(func, args=(), kwargs=None, *, priority=PRIORITY_NORMAL,
+             delay=None, max_attempts=MAX_ATTEMPTS):
+    """Ставит func(*args, **kwargs) в очередь; возвращает Job.
+
+    Задача с большим priority выполняется раньше; delay откладывает
+    первый запуск.
+    """
+    kwargs = kwargs or {}
+    if settings.TASKS_ALWAYS_EAGER:
+        func(*args, **kwargs)
+        return None
+    return Job.objects.create(
+        task=task_path(func),
+        args=json.dumps(list(args)),
+        kwargs=json.dumps(kwargs),
+        priority=priority,
+        run_at=timezone.now() + (delay or timedelta()),
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит func в очередь с обычным приоритетом."""
+    return schedule(func, args, kwargs)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _ready(now):
+    """Задачи, которые можно захватить: готовые и брошенные воркером."""
+    return Job.objects.filter(
+        Q(status=Job.PENDING, run_at__lte=now)
+        | Q(status=Job.RUNNING, lease_until__lt=now,
+            attempts__lt=F('max_attempts'))
+    ).order_by('-priority', 'run_at', 'pk')
+
+
+def _supports_returning():
+    if connection.vendor == 'postgresql':
+        return True
+    return (connection.vendor == 'sqlite'
+            and connection.Database.sqlite_version_info >= (3, 35))
+
+
+CLAIM_COLUMNS = ('id', 'task', 'args', 'kwargs', 'attempts', 'max_attempts')
+
+
+def _claim_returning(now, changes):
+    qn = connection.ops.quote_name
+    ready = _ready(now).values('pk')[:1]
+    if connection.features.has_select_for_update_skip_locked:
+        # Параллельный воркер пропускает строку, а не ждёт её.
+        ready = ready.select_for_update(skip_locked=True)
+    sets = [f'{qn(name)} = %s' for name in changes]
+    sets.append(f'{qn("attempts")} = {qn("attempts")} + 1')
+    params = [Job._meta.get_field(name).get_db_prep_value(value, connection)
+              for name, value in changes.items()]
+    with transaction.atomic():
+        ready_sql, ready_params = ready.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {qn(Job._meta.db_table)} SET {", ".join(sets)} '
+                f'WHERE {qn("id")} IN ({ready_sql}) RETURNING '
+                + ', '.join(qn(column) for column in CLAIM_COLUMNS),
+                params + list(ready_params))
+            row = cursor.fetchone()
+    if row is None:
+        return None
+    return Job(**dict(zip(CLAIM_COLUMNS, row)), **changes)
+
+
+def _claim_select(now, changes, retries=3):
+    # Без RETURNING: выбираем кандидата и захватываем его условным
+    # UPDATE; если обогнал другой воркер, пробуем следующего.
+    for _ in range(retries):
+        pk = _ready(now).values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        if _ready(now).filter(pk=pk).update(
+                attempts=F('attempts') + 1, **changes):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def claim(worker):
+    """Захватывает самую приоритетную готовую задачу или возвращает None."""
+    now = timezone.now()
+    changes = {
+        'status': Job.RUNNING,
+        # Уникальная метка захвата: по ней воркер отчитывается только
+        # о своей аренде.
+        'worker': f'{worker}/{uuid.uuid4().hex[:8]}',
+        'lease_until': now + LEASE_TIMEOUT,
+        'started': now,
+    }
+    if _supports_returning():
+        return _claim_returning(now, changes)
+    return _claim_select(now, changes)
+
+
+def run_job(job):
+    """Выполняет захваченную задачу и записывает исход; True — успех."""
+    mine = Job.objects.filter(pk=job.pk, worker=job.worker)
+    try:
+        func = import_string(job.task)
+        func(*json.loads(job.args), **json.loads(job.kwargs))
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            logger.error('Задача %s не выполнена за %s попыток:\n%s',
+                         job, job.attempts, error)
+            mine.update(status=Job.FAILED, finished=now, lease_until=None,
+                        last_error=error)
+        else:
+            logger.warning('Задача %s упала (попытка %s):\n%s',
+                           job, job.attempts, error)
+            mine.update(
+                status=Job.PENDING, lease_until=None, last_error=error,
+                run_at=now + RETRY_DELAY * 2 ** (job.attempts - 1))
+        return False
+    mine.update(status=Job.DONE, finished=timezone.now(), lease_until=None)
+    return True
+
+
+def cleanup(now=None):
+    """Закрывает брошенные задачи без попыток и удаляет старые готовые."""
+    now = now or timezone.now()
+    Job.objects.filter(
+        status=Job.RUNNING, lease_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(status=Job.FAILED, finished=now, lease_until=None,
+             last_error='Воркер не завершил задачу до конца аренды')
+    Job.objects.filter(status=Job.DONE, finished__lt=now - KEEP_DONE).delete()
+
+
+def run_pending(worker=None, limit=None):
+    """Выполняет готовые задачи, пока они есть; возвращает их число."""
+    worker = worker or worker_name()
+    count = 0
+    while limit is None or count < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        run_job(job)
+        close_old_connections()
+        count += 1
+    return count
+
+
+def work(stop, poll=POLL_INTERVAL):
+    """Цикл воркера: выполняет задачи, пока не выставлено событие stop."""
+    worker = worker_name()
+    last_cleanup = 0
+    while not stop.is_set():
+        close_old_connections()
+        job = claim(worker)
+        if job is not None:
+            run_job(job)
+            continue
+        if time.monotonic() - last_cleanup > CLEANUP_INTERVAL:
+            cleanup()
+            last_cleanup = time.monotonic()
+        stop.wait(poll)
+    close_old_connections()
+
+
+def retry(queryset):
+    """Возвращает упавшие задачи в очередь с новым запасом попыток."""
+    return queryset.filter(status=Job.FAILED).update(
+        status=Job.PENDING, attempts=0, run_at=timezone.now(),
+        finished=None, last_error='')
+
+
+def _average(deltas):
+    return sum(deltas, timedelta()) / len(deltas) if deltas else None
+
+
+def queue_stats(now=None):
+    """Глубина очереди по статусам и приоритетам и задержки за час."""
+    now = now or timezone.now()
+    depth = list(
+        Job.objects.exclude(status=Job.DONE)
+        .values('status', 'priority').annotate(count=Count('pk'))
+        .order_by('-priority', 'status'))
+    oldest = (Job.objects.filter(status=Job.PENDING, run_at__lte=now)
+              .order_by('run_at').values_list('run_at', flat=True).first())
+    recent = list(
+        Job.objects.filter(status=Job.DONE,
+                           finished__gte=now - STATS_WINDOW)
+        .values_list('run_at', 'started', 'finished')[:1000])
+    return {
+        'depth': depth,
+        'oldest_wait': now - oldest if oldest else None,
+        'processed': len(recent),
+        'average_wait': _average(
+            [started - run_at for run_at, started, _ in recent]),
+        'average_run': _average(
+            [finished - started for _, started, finished in recent]),
+    }
@@ -0,0 +1,30 @@
+import os
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def temp_media_settings(directory):
+    """Настройки, уводящие файлы тестов из рабочего дерева в directory."""
+    return override_settings(
+        MEDIA_ROOT=os.path.join(directory, 'media'),
+        THUMBNAIL_KVSTORE_PATH=os.path.join(directory, 'thumbnails.sqlite3'),
+        MAIL_QUEUE_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+
+
+class TempMediaTestRunner(DiscoverRunner):
+    """Прогон manage.py test, после которого дерево проекта остаётся чистым."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._directory = tempfile.mkdtemp(prefix='yatube-test-')
+        self._settings = temp_media_settings(self._directory)
+        self._settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._settings.disable()
+        shutil.rmtree(self._directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,179 @@
+import asyncio
+
+from django.core.wsgi import get_wsgi_application
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+
+from core.asgi import ASGIHandler, ResponseAborted
+from core.events import EventStreamResponse, LocalBroker
+
+UPLOAD_CHUNKS = [b'a' * 1000, b'b' * 1000, b'c' * 10]
+
+
+def echo_app(environ, start_response):
+    length = int(environ['CONTENT_LENGTH'])
+    body = environ['wsgi.input'].read(length)
+    start_response('201 Created', [('Content-Type', 'text/plain'),
+                                   ('X-Path', environ['PATH_INFO'])])
+    return iter([body[:10], body[10:]])
+
+
+def call(application, path, method='GET', chunks=(b'',), headers=()):
+    messages = [
+        {'type': 'http.request', 'body': chunk,
+         'more_body': number < len(chunks) - 1}
+        for number, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(0)
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    asyncio.run(application(scope, receive, send))
+    return parse(sent)
+
+
+def parse(sent):
+    start = sent[0]
+    body = b''.join(message.get('body', b'') for message in sent[1:])
+    return start['status'], dict(start['headers']), body
+
+
+def events_app(broker):
+    def app(environ, start_response):
+        if environ['PATH_INFO'] == '/events/':
+            response = EventStreamResponse(broker.subscribe(['posts']))
+        else:
+            response = HttpResponse('ok')
+        start_response('200 OK', list(response.items()))
+        return response
+    return app
+
+
+def http_scope(path):
+    return {'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': b'', 'headers': []}
+
+
+class StreamClient:
+    """Клиент, который держит поток событий, пока не выставлен gone."""
+
+    def __init__(self):
+        self.sent = []
+        self.gone = asyncio.Event()
+
+    async def receive(self):
+        if not self.sent:
+            return {'type': 'http.request', 'body': b''}
+        await self.gone.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def wait_for(self, count):
+        while len(self.sent) < count:
+            await asyncio.sleep(0.01)
+
+
+async def plain_request(handler, path):
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    await handler(http_scope(path), receive, send)
+    return sent
+
+
+class ASGIHandlerTests(SimpleTestCase):
+    def test_upload_spooled_and_streamed(self):
+        """Тело запроса собирается из частей, ответ уходит по частям."""
+        status, headers, body = call(
+            ASGIHandler(echo_app, max_workers=1), '/create/', 'POST',
+            UPLOAD_CHUNKS)
+        self.assertEqual(status, 201)
+        self.assertEqual(headers[b'x-path'], b'/create/')
+        self.assertEqual(body, b''.join(UPLOAD_CHUNKS))
+
+    def test_django_page(self):
+        """Страница Django отдаётся через ASGI."""
+        status, headers, body = call(
+            ASGIHandler(get_wsgi_application(), max_workers=2),
+            '/about/tech/')
+        self.assertEqual(status, 200)
+        self.assertTrue(headers[b'content-type'].startswith(b'text/html'))
+        self.assertIn('Технологии'.encode(), body)
+
+    def test_application_error(self):
+        """Исключение в приложении превращается в ответ 500."""
+        def broken_app(environ, start_response):
+            raise RuntimeError
+
+        with self.assertLogs('core.asgi', 'ERROR'):
+            status, _, _ = call(ASGIHandler(broken_app, max_workers=1), '/')
+        self.assertEqual(status, 500)
+
+    def test_error_after_start_aborts(self):
+        """Ошибка посреди тела обрывает ответ, а не завершает его."""
+        def truncated_app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            yield b'first'
+            raise RuntimeError
+
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/',
+                 'query_string': b'', 'headers': []}
+        handler = ASGIHandler(truncated_app, max_workers=1)
+        with self.assertLogs('core.asgi', 'ERROR'), \
+                self.assertRaises(ResponseAborted):
+            asyncio.run(handler(scope, receive, send))
+        self.assertEqual(parse(sent)[2], b'first')
+        self.assertTrue(all(message.get('more_body', False)
+                            for message in sent[1:]))
+
+    def test_event_stream_served_by_loop(self):
+        """Поток событий не держит поток пула до отключения клиента."""
+        broker = LocalBroker()
+        handler = ASGIHandler(events_app(broker), max_workers=1)
+        client = StreamClient()
+
+        async def scenario():
+            stream = asyncio.ensure_future(handler(
+                http_scope('/events/'), client.receive, client.send))
+            await asyncio.wait_for(client.wait_for(2), 5)
+            # Единственный поток пула свободен для обычного запроса.
+            other = await asyncio.wait_for(plain_request(handler, '/'), 5)
+            broker.publish('posts', 'post', '<p>x</p>')
+            await asyncio.wait_for(client.wait_for(3), 5)
+            client.gone.set()
+            await asyncio.wait_for(stream, 5)
+            return other
+
+        other = asyncio.run(scenario())
+        self.assertEqual(parse(other)[2], b'ok')
+        _, headers, body = parse(client.sent)
+        self.assertEqual(headers[b'content-type'], b'text/event-stream')
+        self.assertIn(b'event: post\ndata: <p>x</p>\n\n', body)
+        self.assertEqual(dict(broker._subscriptions), {})
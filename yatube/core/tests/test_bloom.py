@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase
+
+from core.bloom import BloomFilter, RotatingBloomFilter
+
+CAPACITY = 1000
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives(self):
+        """Добавленный ключ всегда находится."""
+        bloom = BloomFilter(CAPACITY)
+        keys = [f'key{number}' for number in range(CAPACITY)]
+        self.assertTrue(all(bloom.add(key) for key in keys[:10]))
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertFalse(bloom.add(keys[0]))
+
+    def test_error_rate(self):
+        """Ложных срабатываний не больше заявленного с запасом."""
+        bloom = BloomFilter(CAPACITY, error_rate=0.01)
+        for number in range(CAPACITY):
+            bloom.add(f'key{number}')
+        false = sum(f'other{number}' in bloom for number in range(10000))
+        self.assertLess(false, 300)
+
+    def test_rotation_forgets_old_keys(self):
+        """Ключ помнится одно-два окна, потом забывается."""
+        bloom = RotatingBloomFilter(CAPACITY, window=60)
+        self.assertTrue(bloom.add('key', 0))
+        self.assertFalse(bloom.add('key', 30))
+        self.assertFalse(bloom.add('key', 61))
+        self.assertTrue(bloom.add('other', 200))
+        self.assertTrue(bloom.add('key', 200))
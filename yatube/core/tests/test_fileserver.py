@@ -0,0 +1,98 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.fileserver import FileServer
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+STATIC_SOURCE = os.path.join(TEMP_ROOT, 'source')
+STATIC_ROOT = os.path.join(TEMP_ROOT, 'static')
+MEDIA_ROOT = os.path.join(TEMP_ROOT, 'media')
+CSS = b'body { color: red; }\n' * 100
+
+
+def django_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, MEDIA_ROOT=MEDIA_ROOT,
+                   STATICFILES_DIRS=[STATIC_SOURCE])
+class FileServerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(STATIC_SOURCE, 'css'))
+        os.makedirs(MEDIA_ROOT)
+        with open(os.path.join(STATIC_SOURCE, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        with open(os.path.join(MEDIA_ROOT, 'clip.bin'), 'wb') as f:
+            f.write(bytes(range(100)))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def request(self, path, **environ):
+        environ.setdefault('REQUEST_METHOD', 'GET')
+        environ['PATH_INFO'] = path
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = int(status.split()[0])
+            response['headers'] = dict(headers)
+
+        body = b''.join(FileServer(django_app)(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def collect(self):
+        with override_settings(STATICFILES_STORAGE=(
+                'core.staticfiles.CompressedManifestStaticFilesStorage')):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            return staticfiles_storage.stored_name('css/site.css')
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """collectstatic кладёт рядом с хешированным файлом .gz копию."""
+        hashed = self.collect()
+        self.assertRegex(hashed, r'^css/site\.[0-9a-f]{12}\.css$')
+        with gzip.open(os.path.join(STATIC_ROOT, hashed + '.gz')) as f:
+            self.assertEqual(f.read(), CSS)
+
+    def test_precompressed_and_immutable(self):
+        """Хешированная статика отдаётся сжатой и с долгим кешем."""
+        hashed = self.collect()
+        status, headers, body = self.request(
+            '/static/' + hashed, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_range_and_conditional(self):
+        """Медиа поддерживают Range и If-None-Match."""
+        status, headers, body = self.request(
+            '/media/clip.bin', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(status, 206)
+        self.assertEqual(body, bytes(range(10, 20)))
+        self.assertEqual(headers['Content-Range'], 'bytes 10-19/100')
+        status, _, _ = self.request(
+            '/media/clip.bin', HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, 304)
+        status, _, _ = self.request(
+            '/media/clip.bin', HTTP_RANGE='bytes=200-')
+        self.assertEqual(status, 416)
+
+    def test_other_paths(self):
+        """Чужие и выходящие за корень пути не отдаются как файлы."""
+        self.assertEqual(self.request('/about/')[2], b'django')
+        self.assertEqual(self.request('/media/../source/css/site.css')[0],
+                         404)
+        self.assertEqual(
+            self.request('/media/clip.bin', REQUEST_METHOD='POST')[0], 405)
@@ -0,0 +1,160 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks
+from core.models import Job
+
+User = get_user_model()
+
+calls = []
+
+
+def record(name, suffix=''):
+    calls.append(name + suffix)
+
+
+def explode():
+    raise ValueError('сломалось')
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_stores_job(self):
+        """Задача ложится в таблицу и не выполняется в запросе."""
+        tasks.enqueue(record, 'первая', suffix='!')
+        job = Job.objects.get()
+        self.assertEqual(job.task, 'core.tests.test_jobs.record')
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(calls, [])
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, ['первая!'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_runs_inline(self):
+        """В режиме отладки задача выполняется сразу."""
+        tasks.enqueue(record, 'сразу')
+        self.assertEqual(calls, ['сразу'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_priority_order(self):
+        """Задачи с большим приоритетом выполняются раньше."""
+        tasks.schedule(record, ['обычная'])
+        tasks.schedule(record, ['фоновая'], priority=tasks.PRIORITY_LOW)
+        tasks.schedule(record, ['срочная'], priority=tasks.PRIORITY_HIGH)
+        tasks.schedule(record, ['позже'], priority=tasks.PRIORITY_HIGH,
+                       delay=timedelta(hours=1))
+        tasks.run_pending()
+        self.assertEqual(calls, ['срочная', 'обычная', 'фоновая'])
+
+    def test_claim_is_single_update(self):
+        """Захват задачи — один UPDATE ... RETURNING без SELECT."""
+        tasks.enqueue(record, 'первая')
+        with CaptureQueriesContext(connection) as queries:
+            job = tasks.claim('test')
+        statements = [query['sql'] for query in queries.captured_queries
+                      if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('UPDATE'))
+        self.assertIn('RETURNING', statements[0])
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(tasks.claim('test'))
+
+    def test_claim_without_returning(self):
+        """Без RETURNING захват делается условным UPDATE."""
+        tasks.enqueue(record, 'первая')
+        with mock.patch.object(tasks, '_supports_returning',
+                               return_value=False):
+            job = tasks.claim('test')
+            self.assertIsNone(tasks.claim('test'))
+        self.assertEqual(job.status, Job.RUNNING)
+        tasks.run_job(job)
+        self.assertEqual(calls, ['первая'])
+
+    def test_failed_job_retried_with_backoff(self):
+        """Упавшая задача откладывается, а после всех попыток — ошибка."""
+        job = tasks.schedule(explode, max_attempts=2)
+        with self.assertLogs('core.tasks', 'WARNING'):
+            tasks.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertIn('ValueError: сломалось', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(tasks.run_pending(), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+        tasks.retry(Job.objects.all())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 0))
+
+    def test_expired_lease_reclaimed(self):
+        """Задачу воркера, не отчитавшегося до конца аренды, берёт другой."""
+        tasks.enqueue(record, 'первая')
+        lost = tasks.claim('упавший')
+        self.assertIsNone(tasks.claim('живой'))
+        Job.objects.update(lease_until=timezone.now() - timedelta(seconds=1))
+        job = tasks.claim('живой')
+        self.assertEqual(job.pk, lost.pk)
+        self.assertEqual(job.attempts, 2)
+        tasks.run_job(job)
+        # Опоздавший воркер не перезаписывает чужой результат.
+        tasks.run_job(lost)
+        self.assertEqual(Job.objects.get().worker, job.worker)
+
+    def test_cleanup(self):
+        """Брошенные задачи без попыток закрываются, старые удаляются."""
+        now = timezone.now()
+        abandoned = tasks.schedule(record, ['x'], max_attempts=1)
+        tasks.claim('упавший')
+        Job.objects.filter(pk=abandoned.pk).update(
+            lease_until=now - timedelta(seconds=1))
+        Job.objects.create(task='old', status=Job.DONE,
+                           finished=now - tasks.KEEP_DONE * 2)
+        tasks.cleanup()
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.status, Job.FAILED)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_runworkers_once(self):
+        """manage.py runworkers --once выполняет очередь и выходит."""
+        tasks.enqueue(record, 'первая')
+        out = StringIO()
+        call_command('runworkers', once=True, stdout=out)
+        self.assertEqual(calls, ['первая'])
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+
+    def test_admin_shows_queue_stats(self):
+        """Список задач в админке показывает глубину очереди."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'x')
+        self.client.force_login(admin)
+        tasks.schedule(record, ['x'], priority=tasks.PRIORITY_HIGH)
+        tasks.enqueue(record, 'y')
+        tasks.run_pending(limit=1)
+        response = self.client.get(reverse('admin:core_job_changelist'))
+        self.assertEqual(response.status_code, 200)
+        stats = response.context['stats']
+        self.assertEqual(stats['depth'], [
+            {'status': 'Ждёт', 'priority': 0, 'count': 1}])
+        self.assertEqual(stats['processed'], 1)
+        self.assertContains(response, 'Выполнено за час: 1')
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.mail import send_queued
+from core.models import QueuedEmail
+
+User = get_user_model()
+
+
+class CountingBackend(locmem.EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('почтовый сервер недоступен')
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    MAIL_QUEUE_BACKEND='core.tests.test_mail.CountingBackend',
+)
+class MailQueueTests(TestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+
+    def test_mail_sent_in_background(self):
+        """send_mail только ставит письмо в очередь, отправляет задача."""
+        mail.send_mail('Тема', 'Текст', None, ['reader@example.com'])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIsNotNone(QueuedEmail.objects.get().sent)
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_batch_reuses_connection(self):
+        """Каждая пачка уходит через одно соединение."""
+        for number in range(5):
+            mail.send_mail('Тема', 'Текст', None, [f'user{number}@a.ru'])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(send_queued(batch_size=2), 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 3)
+        self.assertEqual(send_queued(), 0)
+
+    @override_settings(
+        TASKS_ALWAYS_EAGER=False,
+        MAIL_QUEUE_BACKEND='core.tests.test_mail.FailingBackend',
+    )
+    def test_failed_mail_retried_later(self):
+        """Неотправленное письмо ждёт следующей попытки."""
+        mail.send_mail('Тема', 'Текст', None, ['reader@example.com'])
+        with self.assertLogs('core.mail', 'WARNING'):
+            send_queued()
+        queued = QueuedEmail.objects.get()
+        self.assertIsNone(queued.sent)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('ConnectionRefusedError', queued.last_error)
+        self.assertEqual(send_queued(), 0)
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_password_reset_queued(self):
+        """Письмо сброса пароля не отправляется в запросе."""
+        User.objects.create_user('reader', 'reader@example.com', 'x')
+        response = self.client.post(reverse('users:reset'),
+                                    {'email': 'reader@example.com'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+        send_queued()
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import ratelimit
+from posts.models import Post
+
+User = get_user_model()
+
+COMMENT_LIMIT = 10
+
+
+class HitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_leaks_between_windows(self):
+        """Ведро пропускает limit запросов и освобождается со временем."""
+        rule = ratelimit.Rule('user:3/m')
+        start = 60 * 1000
+        for _ in range(3):
+            self.assertEqual(ratelimit.hit('test', rule, '1', start), 0)
+        self.assertGreater(ratelimit.hit('test', rule, '1', start + 1), 0)
+        # В следующем окне предыдущее ещё учитывается...
+        self.assertGreater(ratelimit.hit('test', rule, '1', start + 61), 0)
+        # ...а когда оно почти вытекло, место появляется.
+        self.assertEqual(ratelimit.hit('test', rule, '1', start + 119), 0)
+        # У другого пользователя своё ведро.
+        self.assertEqual(ratelimit.hit('test', rule, '2', start + 1), 0)
+
+    def test_bad_rule(self):
+        """Неизвестная область лимита отклоняется сразу."""
+        with self.assertRaises(ValueError):
+            ratelimit.Rule('group:1/m')
+
+
+class ThrottleTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test-username')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        ratelimit.reset()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        ratelimit.reset()
+
+    def test_comment_flood_limited(self):
+        """Поток комментариев упирается в лимит и получает 429."""
+        url = reverse('posts:add_comment', args=[self.post.pk])
+        for _ in range(COMMENT_LIMIT):
+            response = self.client.post(url, data={'text': 'Комментарий'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        with self.assertLogs('core.ratelimit', 'WARNING'):
+            response = self.client.post(url, data={'text': 'Комментарий'})
+        self.assertEqual(response.status_code,
+                         HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.post.comments.count(), COMMENT_LIMIT)
+        metrics = ratelimit.get_metrics()
+        self.assertEqual(metrics['posts:add_comment', 'allowed'],
+                         COMMENT_LIMIT)
+        self.assertEqual(metrics['posts:add_comment', 'limited'], 1)
+
+    def test_safe_methods_not_counted(self):
+        """GET формы создания поста не расходует лимит."""
+        for _ in range(20):
+            response = self.client.get(reverse('posts:post_create'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(ratelimit.get_metrics(), {})
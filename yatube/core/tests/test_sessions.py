@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from core import sessions
+from core.sessions import SessionStore
+
+User = get_user_model()
+
+# Случайная строка не сжимается и заведомо не помещается в cookie.
+LARGE_PAYLOAD = get_random_string(sessions.SIGNED_MAX_LENGTH * 2)
+
+
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_small_session_signed(self):
+        """Небольшая сессия живёт в cookie и не пишет в базу."""
+        session = SessionStore()
+        session['answer'] = 42
+        with self.assertNumQueries(0):
+            session.save()
+            restored = SessionStore(session.session_key)
+            self.assertEqual(restored['answer'], 42)
+        self.assertTrue(sessions.is_signed(session.session_key))
+
+    def test_large_session_in_database(self):
+        """Крупная сессия уходит в базу и читается из кэша."""
+        session = SessionStore()
+        session['payload'] = LARGE_PAYLOAD
+        session.save()
+        self.assertFalse(sessions.is_signed(session.session_key))
+        self.assertTrue(Session.objects.filter(
+            pk=session.session_key).exists())
+        with self.assertNumQueries(0):
+            restored = SessionStore(session.session_key)
+            self.assertEqual(restored['payload'], LARGE_PAYLOAD)
+
+    def test_shrunk_session_leaves_database(self):
+        """Похудевшая сессия переезжает в cookie и удаляется из базы."""
+        session = SessionStore()
+        session['payload'] = LARGE_PAYLOAD
+        session.save()
+        old_key = session.session_key
+        del session['payload']
+        session.save()
+        self.assertTrue(sessions.is_signed(session.session_key))
+        self.assertFalse(Session.objects.filter(pk=old_key).exists())
+
+    def test_tampered_cookie_rejected(self):
+        """Подделанная cookie даёт пустую сессию."""
+        session = SessionStore()
+        session['_auth_user_id'] = '1'
+        session.save()
+        forged = SessionStore(session.session_key[:-1] + 'x')
+        self.assertNotIn('_auth_user_id', forged)
+
+    def test_clear_expired_in_batches(self):
+        """clear_expired удаляет все истёкшие сессии, свежие оставляет."""
+        expired = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create([
+            Session(session_key=f'expired{number:05}', session_data='',
+                    expire_date=expired)
+            for number in range(sessions.CLEANUP_BATCH + 10)
+        ])
+        Session.objects.create(
+            session_key='alive00001', session_data='',
+            expire_date=timezone.now() + timedelta(days=1))
+        SessionStore.clear_expired()
+        self.assertEqual(
+            list(Session.objects.values_list('pk', flat=True)),
+            ['alive00001'])
+
+
+class AuthenticatedRequestTests(TestCase):
+    def test_logged_in_page_skips_session_table(self):
+        """Страница вошедшего пользователя не читает django_session."""
+        user = User.objects.create_user(username='test-username')
+        client = Client()
+        client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['user'], user)
+        self.assertFalse(any('django_session' in query['sql']
+                             for query in queries))
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+
+from core.thumbnails import SQLiteKVStore, prefetch_thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+KVSTORE_PATH = os.path.join(TEMP_MEDIA_ROOT, 'thumbnails.sqlite3')
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   THUMBNAIL_KVSTORE_PATH=KVSTORE_PATH)
+class SQLiteKVStoreTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_raw_operations(self):
+        """Запись, чтение, поиск по префиксу и удаление ключей."""
+        store = SQLiteKVStore()
+        store._set_raw('sorl||image||a', 'first')
+        store._set_raw('sorl||image||b', 'second')
+        store._set_raw('sorl||thumbnails||a', 'third')
+        self.assertEqual(store._get_raw('sorl||image||a'), 'first')
+        self.assertEqual(
+            sorted(store._find_keys_raw('sorl||image||')),
+            ['sorl||image||a', 'sorl||image||b'])
+        self.assertEqual(
+            store.get_many_raw(['sorl||image||b', 'missing']),
+            {'sorl||image||b': 'second'})
+        store._delete_raw('sorl||image||a', 'sorl||image||b')
+        self.assertIsNone(store._get_raw('sorl||image||a'))
+
+    def test_prefetched_thumbnails_skip_store(self):
+        """После prefetch миниатюры ленты находятся без запросов к файлу."""
+        user = User.objects.create_user(username='test-username')
+        posts = [
+            Post.objects.create(
+                text='Текст', author=user,
+                image=SimpleUploadedFile(f'{i}.gif', SMALL_GIF + bytes([i])))
+            for i in range(3)
+        ]
+        options = {'crop': 'center', 'upscale': True}
+        expected = [get_thumbnail(post.image, '960x339', **options).name
+                    for post in posts]
+        default.kvstore.forget()
+        prefetch_thumbnails([post.image for post in posts], '960x339',
+                            **options)
+        with mock.patch.object(SQLiteKVStore, '_connection') as connection:
+            names = [get_thumbnail(post.image, '960x339', **options).name
+                     for post in posts]
+        connection.assert_not_called()
+        self.assertEqual(names, expected)
@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+
+MISSING = object()
+SQLITE_MAX_VARIABLES = 900
+
+
+class SQLiteKVStore(KVStoreBase):
+    """Метаданные миниатюр sorl в отдельном файле SQLite.
+
+    Поиск миниатюры не ходит ни в основную базу, ни в кеш. Ключи,
+    загруженные через prefetch(), до конца запроса читаются из памяти,
+    поэтому лента из десяти постов получает их одним запросом.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+
+    def _connection(self):
+        path = settings.THUMBNAIL_KVSTORE_PATH
+        if getattr(self._local, 'path', None) != path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            connection = sqlite3.connect(
+                path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS kvstore ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID')
+            self._local.connection = connection
+            self._local.path = path
+        return self._local.connection
+
+    @property
+    def _memo(self):
+        if not hasattr(self._local, 'memo'):
+            self._local.memo = {}
+        return self._local.memo
+
+    def forget(self):
+        self._memo.clear()
+
+    def get_many_raw(self, keys):
+        keys = list(keys)
+        values = {}
+        for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+            chunk = keys[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ', '.join('?' * len(chunk))
+            values.update(self._connection().execute(
+                'SELECT key, value FROM kvstore '
+                f'WHERE key IN ({placeholders})', chunk))
+        return values
+
+    def prefetch(self, keys):
+        missing = [key for key in keys if key not in self._memo]
+        if not missing:
+            return
+        values = self.get_many_raw(missing)
+        for key in missing:
+            self._memo[key] = values.get(key, MISSING)
+
+    def _get_raw(self, key):
+        value = self._memo.get(key)
+        if value is None:
+            row = self._connection().execute(
+                'SELECT value FROM kvstore WHERE key = ?', (key,)).fetchone()
+            value = row[0] if row else MISSING
+        return None if value is MISSING else value
+
+    def _set_raw(self, key, value):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO kvstore (key, value) VALUES (?, ?)',
+            (key, value))
+        self._memo.pop(key, None)
+
+    def _delete_raw(self, *keys):
+        for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+            chunk = keys[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ', '.join('?' * len(chunk))
+            self._connection().execute(
+                f'DELETE FROM kvstore WHERE key IN ({placeholders})', chunk)
+        for key in keys:
+            self._memo.pop(key, None)
+
+    def _find_keys_raw(self, prefix):
+        rows = self._connection().execute(
+            'SELECT key FROM kvstore WHERE key >= ? AND key < ?',
+            (prefix, prefix + '\uffff'))
+        return [key for key, in rows]
+
+
+def thumbnail_key(file_, geometry_string, **options):
+    """Ключ, под которым sorl ищет миниатюру в get_thumbnail."""
+    backend = default.backend
+    source = ImageFile(file_)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry_string, options)
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def prefetch_thumbnails(files, geometry_string, **options):
+    """Загружает метаданные миниатюр для всех файлов одним запросом."""
+    kvstore = default.kvstore
+    if not hasattr(kvstore, 'prefetch'):
+        return
+    kvstore.prefetch([
+        thumbnail_key(file_, geometry_string, **options)
+        for file_ in files if file_
+    ])
+
+
+def _forget_prefetched(**kwargs):
+    kvstore = default.kvstore
+    if hasattr(kvstore, 'forget'):
+        kvstore.forget()
+
+
+request_started.connect(_forget_prefetched)
+request_finished.connect(_forget_prefetched)
@@ -1,23 +1,124 @@
-from django.contrib import admin
-
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.shortcuts import render
+from django.urls import path, reverse
+from django.utils.html import format_html
 
+from core.paginator import EstimatedCountPaginator
+from . import moderation
 from .models import Post, Group, Comment
+from .search import search_posts
+
+
+class ModerationActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа',
+        empty_label='-без группы-')
+
+
+class ModerationAdminMixin:
+    """Фоновые действия модерации и страница их прогресса."""
+
+    def get_urls(self):
+        return [
+            path('moderation/<str:job_id>/',
+                 self.admin_site.admin_view(self.moderation_progress),
+                 name=self.progress_url_name),
+        ] + super().get_urls()
+
+    @property
+    def progress_url_name(self):
+        meta = self.model._meta
+        return f'{meta.app_label}_{meta.model_name}_moderation'
+
+    def moderation_progress(self, request, job_id):
+        progress = moderation.get_progress(job_id)
+        if progress is None:
+            raise Http404('Задача не найдена')
+        return render(request, 'admin/posts/moderation_progress.html', {
+            **self.admin_site.each_context(request),
+            'title': progress['title'],
+            'progress': progress,
+        })
+
+    def start_moderation(self, request, title, task, *args):
+        job_id = moderation.start(title, task, *args)
+        url = reverse(f'admin:{self.progress_url_name}', args=[job_id])
+        self.message_user(request, format_html(
+            'Задача «{}» запущена. <a href="{}">Ход выполнения</a>',
+            title, url), messages.SUCCESS)
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(ModerationAdminMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
         'pub_date',
         'author',
         'group',
+        'views',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    # без полного COUNT(*) по таблице постов на каждую страницу списка
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ('author',)
+    action_form = ModerationActionForm
+    actions = ('delete_all_by_authors', 'move_to_group')
+
+    def get_search_results(self, request, queryset, search_term):
+        return search_posts(queryset, search_term), False
+
+    def delete_all_by_authors(self, request, queryset):
+        author_ids = list(
+            queryset.order_by().values_list('author_id', flat=True)
+            .distinct())
+        self.start_moderation(
+            request, 'Удаление всех постов авторов',
+            moderation.delete_posts_by_authors, author_ids)
+    delete_all_by_authors.short_description = (
+        'Удалить все посты авторов выбранных постов')
+
+    def move_to_group(self, request, queryset):
+        try:
+            group = ModerationActionForm.base_fields['group'].clean(
+                request.POST.get('group'))
+        except ValidationError as error:
+            self.message_user(request, error.messages[0], messages.ERROR)
+            return
+        post_ids = list(queryset.order_by().values_list('pk', flat=True))
+        self.start_moderation(
+            request, f'Перенос постов в группу {group or "-без группы-"}',
+            moderation.move_posts_to_group, post_ids,
+            group.pk if group else None)
+    move_to_group.short_description = 'Перенести выбранные посты в группу'
+
+
+@admin.register(Comment)
+class CommentAdmin(ModerationAdminMixin, admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    search_fields = ('text',)
+    raw_id_fields = ('author', 'post')
+    actions = ('purge_matching',)
+
+    def purge_matching(self, request, queryset):
+        texts = list(
+            queryset.order_by().values_list('text', flat=True).distinct())
+        self.start_moderation(
+            request, 'Удаление комментариев с тем же текстом',
+            moderation.purge_comments, texts)
+    purge_matching.short_description = (
+        'Удалить все комментарии с текстом выбранных')
 
 
 admin.site.register(Group)
-admin.site.register(Comment)
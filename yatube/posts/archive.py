@@ -0,0 +1,73 @@
+"""Перенос старых постов и их комментариев в архивные таблицы.
+
+Архив лежит в той же базе: внешние ключи на пользователей и группы
+между файлами SQLite невозможны. Ленты профиля и группы продолжаются в
+архив через QuerySetChain, страница поста ищет его и там.
+
+Реакции, просмотры, активность и уведомления ссылаются на пост через
+posts.models.post_link и при переносе остаются на месте: архивный пост
+сохраняет id. Их удаляет delete_post_data, когда пост удаляют насовсем.
+"""
+from django.db import transaction
+
+from core.paginator import analyze
+
+from .caching import invalidate_posts
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Notification, Post, PostViews,
+    Reaction, ReactionCounter, TrendingBucket,
+)
+
+ARCHIVE_BATCH = 500
+POST_DATA = (Reaction, ReactionCounter, PostViews, TrendingBucket,
+             Notification)
+
+
+def delete_post_data(post_ids):
+    """Удаляет реакции, просмотры и уведомления удалённых постов."""
+    for model in POST_DATA:
+        model.objects.filter(post_id__in=post_ids)._raw_delete(
+            model.objects.db)
+
+
+def _copy(instance, model):
+    """Экземпляр model с теми же значениями общих полей."""
+    names = {field.attname for field in model._meta.concrete_fields}
+    return model(**{
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname in names
+    })
+
+
+def archive_posts(before, batch_size=ARCHIVE_BATCH):
+    """Переносит в архив посты, опубликованные раньше before.
+
+    Каждая пачка переносится в своей транзакции: копии создаются одним
+    INSERT, оригиналы удаляются одним DELETE на таблицу без сигналов
+    post_delete — пост не удалён, а переехал. Возвращает число
+    перенесённых постов.
+    """
+    queryset = Post.objects.filter(pub_date__lt=before).order_by('pk')
+    archived = 0
+    while True:
+        with transaction.atomic():
+            posts = list(queryset[:batch_size])
+            if not posts:
+                break
+            pks = [post.pk for post in posts]
+            ArchivedPost.objects.bulk_create(
+                [_copy(post, ArchivedPost) for post in posts])
+            ArchivedComment.objects.bulk_create([
+                _copy(comment, ArchivedComment)
+                for comment in Comment.objects.filter(post_id__in=pks)
+            ])
+            Comment.objects.filter(post_id__in=pks)._raw_delete(
+                Comment.objects.db)
+            Post.objects.filter(pk__in=pks)._raw_delete(Post.objects.db)
+        archived += len(posts)
+    if archived:
+        # Иначе оценка числа постов в админке помнит удалённые строки.
+        analyze(Post, ArchivedPost)
+        invalidate_posts()
+    return archived
@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+GENERATION_KEY = 'posts:generation'
+PROFILE_HEADER_TIMEOUT = 10 * 60
+COMMENTS_TIMEOUT = 60 * 60
+
+
+def generation():
+    """Номер поколения закэшированных лент.
+
+    Входит в ключи кэша, поэтому после массовых правок старые записи
+    просто перестают читаться и истекают сами.
+    """
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def invalidate_posts():
+    """Сбрасывает кэши лент после массового изменения постов."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, None)
+    cache.delete(make_template_fragment_key('index_page'))
+
+
+def profile_header_key(username):
+    return f'profile_header:{generation()}:{username}'
+
+
+def invalidate_profile_header(*usernames):
+    """Сбрасывает шапки профилей, счётчики в которых изменились."""
+    cache.delete_many([profile_header_key(name) for name in usernames])
+
+
+def comments_key(post_id):
+    return f'post_comments:{generation()}:{post_id}'
+
+
+def invalidate_comments(*post_ids):
+    cache.delete_many([comments_key(post_id) for post_id in post_ids])
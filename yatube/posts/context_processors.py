@@ -0,0 +1,16 @@
+from functools import partial
+
+from core.events import events_supported
+from .notifications import unread_count
+
+
+def live_updates(request):
+    """Подключать ли на странице живое обновление (EventSource)."""
+    return {'live_updates': events_supported(request)}
+
+
+def notifications(request):
+    """Число непрочитанных уведомлений; считается, только если выведено."""
+    if not request.user.is_authenticated:
+        return {}
+    return {'unread_notifications': partial(unread_count, request.user.pk)}
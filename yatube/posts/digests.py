@@ -0,0 +1,87 @@
+"""Еженедельная рассылка «новые записи авторов, на которых вы подписаны».
+
+Лента каждого автора за период читается одним запросом и рендерится
+один раз (author_timelines), а письмо подписчика собирается из готовых
+кусков его авторов без запросов к постам. Подписчики обрабатываются
+пачками по DIGEST_BATCH: одна выборка подписок на пачку и один INSERT
+писем в очередь core.mail, откуда они уходят в фоне.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.mail import queue_messages
+from .models import Follow, Post, User
+from .rows import post_rows
+
+DIGEST_BATCH = 200
+DIGEST_PERIOD = timedelta(days=7)
+POSTS_PER_AUTHOR = 5
+SUBJECT = 'Новые записи ваших авторов за неделю'
+
+
+def author_timelines(since):
+    """{id автора: (текст, HTML)} с его записями, вышедшими после since."""
+    posts = defaultdict(list)
+    for post in post_rows(Post.objects.filter(pub_date__gte=since)):
+        posts[post.author.pk].append(post)
+    timelines = {}
+    for author_id, author_posts in posts.items():
+        context = {
+            'author': author_posts[0].author,
+            'posts': author_posts[:POSTS_PER_AUTHOR],
+            'count': len(author_posts),
+            'site_url': settings.SITE_URL,
+        }
+        timelines[author_id] = (
+            render_to_string('posts/email/digest_author.txt', context),
+            render_to_string('posts/email/digest_author.html', context),
+        )
+    return timelines
+
+
+def _message(user, sections):
+    context = {'user': user, 'site_url': settings.SITE_URL}
+    message = EmailMultiAlternatives(
+        SUBJECT,
+        render_to_string('posts/email/digest.txt', dict(
+            context, sections=[text for text, _ in sections])),
+        to=[user.email],
+    )
+    message.attach_alternative(render_to_string(
+        'posts/email/digest.html',
+        dict(context, sections=[html for _, html in sections])),
+        'text/html')
+    return message
+
+
+def build_digests(since=None, batch_size=DIGEST_BATCH):
+    """Ставит в очередь письма подписчикам; возвращает их число."""
+    since = since or timezone.now() - DIGEST_PERIOD
+    timelines = author_timelines(since)
+    if not timelines:
+        return 0
+    readers = User.objects.filter(
+        is_active=True, follower__author_id__in=list(timelines),
+    ).exclude(email='').only('username', 'email').distinct().order_by('pk')
+    queued = 0
+    last_pk = 0
+    while True:
+        batch = list(readers.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return queued
+        last_pk = batch[-1].pk
+        authors = defaultdict(list)
+        for user_id, author_id in Follow.objects.filter(
+                user__in=batch, author_id__in=list(timelines)).order_by(
+                'author_id').values_list('user_id', 'author_id'):
+            authors[user_id].append(author_id)
+        queued += queue_messages([
+            _message(user, [timelines[author_id]
+                            for author_id in authors[user.pk]])
+            for user in batch
+        ])
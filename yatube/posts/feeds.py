@@ -0,0 +1,178 @@
+import hashlib
+from io import StringIO
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .caching import generation
+from .models import Group, Post, User
+
+FEED_ITEMS = 50
+FEED_CACHE_TIMEOUT = 60 * 60
+FEED_ITERATOR_CHUNK = 20
+FEED_TITLE_WORDS = 10
+
+
+class StreamingFeedMixin:
+    """Лента, которая отдаётся по одному элементу, а не целиком."""
+
+    latest = None
+
+    def latest_post_date(self):
+        # Базовая реализация проходит по self.items, а их у нас нет:
+        # элементы приходят из итератора уже во время отдачи ответа.
+        return self.latest or super().latest_post_date()
+
+    def build_item(self, **kwargs):
+        self.add_item(**kwargs)
+        return self.items.pop()
+
+    def stream(self, items):
+        buffer = StringIO()
+        handler = SimplerXMLGenerator(buffer, 'utf-8')
+        self.write_head(handler)
+        for item in items:
+            handler.startElement(self.item_element, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            yield _flush(buffer)
+        self.write_tail(handler)
+        yield _flush(buffer)
+
+
+class StreamingRssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    item_element = 'item'
+
+    def write_head(self, handler):
+        handler.startDocument()
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+class StreamingAtomFeed(StreamingFeedMixin, Atom1Feed):
+    item_element = 'entry'
+
+    def write_head(self, handler):
+        handler.startDocument()
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        handler.endElement('feed')
+
+
+FEED_TYPES = {
+    'rss': StreamingRssFeed,
+    'atom': StreamingAtomFeed,
+}
+
+
+def _flush(buffer):
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+def _post_item(request, feed, post):
+    link = request.build_absolute_uri(
+        reverse('posts:post_detail', args=[post.pk]))
+    return feed.build_item(
+        title=Truncator(post.text).words(FEED_TITLE_WORDS),
+        link=link,
+        description=post.text,
+        author_name=post.author.get_full_name() or post.author.username,
+        pubdate=post.pub_date,
+        unique_id=link,
+        categories=[post.group.title] if post.group else None,
+    )
+
+
+def _items(request, feed, queryset):
+    posts = queryset.select_related('author', 'group')[:FEED_ITEMS]
+    for post in posts.iterator(chunk_size=FEED_ITERATOR_CHUNK):
+        yield _post_item(request, feed, post)
+
+
+def _caching(chunks, cache_key):
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    cache.set(cache_key, ''.join(body), FEED_CACHE_TIMEOUT)
+
+
+def feed_response(request, feed_type, queryset, scope, title, link):
+    if feed_type not in FEED_TYPES:
+        raise Http404('Неизвестный формат ленты')
+    latest = queryset.aggregate(latest=Max('pub_date'))['latest']
+    stamp = latest.isoformat() if latest else 'empty'
+    cache_key = (f'feed:{request.get_host()}:{scope}:{feed_type}:'
+                 f'{generation()}:{stamp}')
+    etag = quote_etag(hashlib.md5(cache_key.encode()).hexdigest())
+    last_modified = int(latest.timestamp()) if latest else None
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    feed = FEED_TYPES[feed_type](
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=title,
+        feed_url=request.build_absolute_uri(),
+        language='ru',
+    )
+    feed.latest = latest
+    content_type = feed.content_type
+    body = cache.get(cache_key)
+    if body is not None:
+        response = HttpResponse(body, content_type=content_type)
+    else:
+        chunks = feed.stream(_items(request, feed, queryset))
+        response = StreamingHttpResponse(
+            _caching(chunks, cache_key), content_type=content_type)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def index_feed(request, feed_type):
+    return feed_response(
+        request, feed_type, Post.objects.all(), 'index',
+        title='Последние обновления на сайте',
+        link=reverse('posts:index'),
+    )
+
+
+def group_feed(request, slug, feed_type):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request, feed_type, group.posts.all(), f'group:{group.pk}',
+        title=f'Записи сообщества {group.title}',
+        link=reverse('posts:posts', args=[group.slug]),
+    )
+
+
+def profile_feed(request, username, feed_type):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request, feed_type, author.posts.all(), f'profile:{author.pk}',
+        title=f'Все посты пользователя {author.username}',
+        link=reverse('posts:profile', args=[author.username]),
+    )
@@ -1,4 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+
+from .images import check_upload
 from .models import Post, Group, Comment
 
 
@@ -27,6 +30,14 @@ class PostForm(forms.ModelForm):
             raise forms.ValidationError('Поле не может быть пустым')
         return data
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            errors = check_upload(image)
+            if errors:
+                raise forms.ValidationError(errors)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,183 @@
+import base64
+import fcntl
+import os
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from .models import ArchivedPost, Post
+from .storage import post_images
+
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_SOURCE_PIXELS = 50_000_000
+MAX_STORED_SIZE = (1920, 1920)
+JPEG_QUALITY = 85
+KEEP_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+PLACEHOLDER_SIZE = (16, 16)
+PLACEHOLDER_QUALITY = 40
+
+
+def check_upload(upload):
+    """Проверяет загруженный файл до сохранения.
+
+    Размеры берутся из заголовка, который уже прочитал
+    forms.ImageField, поэтому пиксели при проверке не декодируются.
+    """
+    errors = []
+    if upload.size > MAX_UPLOAD_SIZE:
+        errors.append(
+            f'Файл больше {MAX_UPLOAD_SIZE // (1024 * 1024)} МБ')
+    width, height = upload.image.size
+    if width * height > MAX_SOURCE_PIXELS:
+        errors.append(f'Картинка {width}x{height} слишком большая')
+    return errors
+
+
+def _upload_name(filename):
+    """Имя для post_images.save: каталог хеша storage добавит сам."""
+    return os.path.join(Post._meta.get_field('image').upload_to, filename)
+
+
+def _needs_processing(image):
+    if getattr(image, 'is_animated', False):
+        return False
+    too_big = (image.width > MAX_STORED_SIZE[0]
+               or image.height > MAX_STORED_SIZE[1])
+    return too_big or 'exif' in image.info or image.format not in KEEP_FORMATS
+
+
+def _reencode(image):
+    output_format = image.format if image.format in KEEP_FORMATS else 'PNG'
+    # Для JPEG draft() позволяет декодировать сразу в уменьшенном
+    # масштабе, не разворачивая в память полный кадр с камеры.
+    image.draft('RGB', MAX_STORED_SIZE)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(MAX_STORED_SIZE, Image.LANCZOS)
+    options = {}
+    if output_format == 'JPEG':
+        image = image.convert('RGB')
+        options = {'quality': JPEG_QUALITY, 'optimize': True,
+                   'progressive': True}
+    buffer = BytesIO()
+    # exif не передаём, поэтому метаданные в новый файл не попадают.
+    image.save(buffer, output_format, **options)
+    return buffer.getvalue(), image, output_format
+
+
+def describe(image):
+    """Поля ImageMeta для картинки: размеры, основной цвет и превью.
+
+    Превью — JPEG размером с PLACEHOLDER_SIZE в data URI, несколько
+    сотен байт; шаблон растягивает его на место картинки, пока та
+    грузится.
+    """
+    rgb = image.convert('RGB')
+    red, green, blue = rgb.resize((1, 1), Image.BOX).getpixel((0, 0))
+    preview = rgb.copy()
+    preview.thumbnail(PLACEHOLDER_SIZE, Image.BOX)
+    buffer = BytesIO()
+    preview.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY)
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return {
+        'image_width': image.width,
+        'image_height': image.height,
+        'image_color': f'#{red:02x}{green:02x}{blue:02x}',
+        'image_placeholder': f'data:image/jpeg;base64,{encoded}',
+    }
+
+
+def store_image_meta(model, pk):
+    """Заполняет ImageMeta у уже обработанной картинки, не меняя файл."""
+    row = model.objects.filter(pk=pk).only('image').first()
+    if row is None or not row.image:
+        return
+    with row.image.storage.open(row.image.name) as stored:
+        with Image.open(stored) as image:
+            meta = describe(image)
+    model.objects.filter(pk=pk, image=row.image.name).update(**meta)
+
+
+def process_post_image(post_id):
+    """Уменьшает оригинал, удаляет EXIF и перекодирует картинку поста.
+
+    Заодно заполняет ImageMeta по итоговой картинке.
+    """
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    source = post.image
+    with source.storage.open(source.name) as stored:
+        with Image.open(stored) as image:
+            content = None
+            if _needs_processing(image):
+                content, image, output_format = _reencode(image)
+            meta = describe(image)
+    if content is None:
+        Post.objects.filter(pk=post_id, image=source.name).update(**meta)
+        return
+    content = ContentFile(content)
+    # Имя с расширением итогового формата: BMP сохраняется как PNG.
+    new_name = source.storage.save(
+        _upload_name('image' + EXTENSIONS[output_format]), content)
+    updated = Post.objects.filter(pk=post_id, image=source.name).update(
+        image=new_name, **meta)
+    if updated:
+        ensure_image(new_name, content)
+    # Если картинку поста успели заменить, пока мы работали,
+    # новый файл никому не нужен и тоже будет удалён.
+    release_image(source.name if updated else new_name)
+
+
+@contextmanager
+def _release_lock():
+    """Блокировка между процессами для release_image и ensure_image."""
+    os.makedirs(post_images.location, exist_ok=True)
+    with open(post_images.path('.release.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def release_image(name):
+    """Удаляет файл и его миниатюры, когда на него не ссылается ни один пост.
+
+    Файлы в post_images общие для всех постов с одинаковой картинкой,
+    поэтому число ссылок — это число постов с таким именем в базе,
+    включая архив. Проверка и удаление идут под _release_lock, см.
+    ensure_image.
+    """
+    if not name:
+        return
+    with _release_lock():
+        if (Post.objects.filter(image=name).exists()
+                or ArchivedPost.objects.filter(image=name).exists()):
+            return
+        try:
+            delete_thumbnails(ImageFile(name, post_images))
+        except SuspiciousFileOperation:
+            # Имя указывает за пределы MEDIA_ROOT, такой файл не наш.
+            pass
+
+
+def ensure_image(name, content):
+    """Возвращает на диск файл, удалённый параллельным release_image.
+
+    Загрузка той же картинки находит файл на диске и не пишет его
+    заново, а release_image, начавший раньше её коммита, не видит
+    новой ссылки и удаляет файл. Поэтому после коммита поста файл
+    проверяется под той же блокировкой: позже начавшийся release_image
+    уже увидит ссылку.
+    """
+    with _release_lock():
+        if post_images.exists(name):
+            return
+        content.seek(0)
+        post_images.save(_upload_name(os.path.basename(name)), content)
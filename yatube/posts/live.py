@@ -0,0 +1,68 @@
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+
+from core.events import (
+    EventStreamResponse, events_supported, get_broker, publish,
+)
+from .images import process_post_image
+from .models import Follow, Post
+
+
+def post_channels(post):
+    return ['posts', f'author:{post.author_id}']
+
+
+def comment_channels(comment):
+    return [f'post:{comment.post_id}']
+
+
+def announce_post(post_id):
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id).first()
+    if post is None:
+        return
+    publish(post_channels(post), 'post', render_to_string(
+        'posts/includes/live_post.html', {'post': post}))
+
+
+def publish_post(post_id):
+    """Фоновая задача для нового поста: картинка, затем рассылка.
+
+    Карточка с миниатюрой рендерится уже по обработанной картинке и не
+    в запросе: миниатюра оригинала декодировала бы полный кадр, а сам
+    оригинал process_post_image удаляет.
+    """
+    process_post_image(post_id)
+    announce_post(post_id)
+
+
+def announce_comment(comment):
+    publish(comment_channels(comment), 'comment', render_to_string(
+        'posts/includes/comment_item.html', {'comment': comment}))
+
+
+def event_stream(request, channels):
+    if not events_supported(request):
+        # На 204 EventSource больше не переподключается.
+        return HttpResponse(status=204)
+    # Подписываемся сразу, а не при первой итерации, чтобы не потерять
+    # события между ответом и началом чтения.
+    return EventStreamResponse(get_broker().subscribe(channels))
+
+
+def index_events(request):
+    return event_stream(request, ['posts'])
+
+
+@login_required
+def follow_events(request):
+    authors = Follow.objects.filter(user=request.user).values_list(
+        'author_id', flat=True)
+    return event_stream(request, [f'author:{author}' for author in authors])
+
+
+def post_events(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return event_stream(request, [f'post:{post.pk}'])
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.POSTS_ARCHIVE_AFTER_DAYS,
+            help='архивировать посты старше этого числа дней')
+
+    def handle(self, *args, days, **options):
+        before = timezone.now() - timedelta(days=days)
+        archived = archive_posts(before)
+        self.stdout.write(f'Перенесено в архив постов: {archived}')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import store_image_meta
+from posts.models import ArchivedPost, Post
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры, цвет и превью картинок у постов, '
+            'загруженных до появления этих полей.')
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            done = failed = 0
+            pending = model.objects.filter(
+                image_width__isnull=True).exclude(image='').order_by('pk')
+            last_pk = 0
+            while True:
+                pks = list(pending.filter(pk__gt=last_pk).values_list(
+                    'pk', flat=True)[:BATCH_SIZE])
+                if not pks:
+                    break
+                for pk in pks:
+                    try:
+                        store_image_meta(model, pk)
+                        done += 1
+                    except OSError as error:
+                        # Файл пропал или не читается: пост остаётся без
+                        # сведений, шаблон покажет картинку как раньше.
+                        failed += 1
+                        self.stderr.write(
+                            f'{model.__name__} {pk}: {error}')
+                last_pk = pks[-1]
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: заполнено {done}, '
+                f'ошибок {failed}')
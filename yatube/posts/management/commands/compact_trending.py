@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import compact
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает списки популярных постов и удаляет '
+            'устаревшие счётчики комментариев.')
+
+    def handle(self, *args, **options):
+        deleted = compact()
+        self.stdout.write(f'Удалено устаревших счётчиков: {deleted}')
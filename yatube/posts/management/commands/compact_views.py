@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.viewcount import HISTORY_DAYS, compact_history
+
+
+class Command(BaseCommand):
+    help = 'Сворачивает старую дневную историю просмотров в месячную.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=HISTORY_DAYS,
+            help='дневные строки младше этого числа дней не трогать')
+
+    def handle(self, *args, days, **options):
+        deleted, created = compact_history(keep_days=days)
+        self.stdout.write(
+            f'Дневных строк свёрнуто: {deleted}, месячных создано: {created}')
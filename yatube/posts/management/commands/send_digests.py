@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.digests import DIGEST_PERIOD, build_digests
+
+
+class Command(BaseCommand):
+    help = ('Ставит в очередь письма с новыми записями авторов, '
+            'на которых подписан пользователь.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=DIGEST_PERIOD.days,
+            help='записи за сколько последних дней включить в письмо')
+
+    def handle(self, *args, days, **options):
+        queued = build_digests(timezone.now() - timedelta(days=days))
+        self.stdout.write(f'Писем поставлено в очередь: {queued}')
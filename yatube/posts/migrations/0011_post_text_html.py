@@ -0,0 +1,96 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:22
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.html import format_html, urlize
+from django.utils.text import Truncator
+
+BATCH_SIZE = 500
+# Копия posts.rendering на момент миграции: миграция не должна
+# зависеть от живого кода и моделей.
+EXCERPT_WORDS = 60
+MENTION = re.compile(r'(?<![\w@/.])@([\w.+-]+)')
+MENTION_TAIL = '.+-'
+
+
+def split_mention(name, existing):
+    if name not in existing:
+        stripped = name.rstrip(MENTION_TAIL)
+        if stripped in existing:
+            return stripped, name[len(stripped):]
+    return name, ''
+
+
+def render_text(text, existing):
+    parts = MENTION.split(text)
+    html = []
+    for number, part in enumerate(parts):
+        if number % 2 == 0:
+            html.append(urlize(part, nofollow=True, autoescape=True))
+            continue
+        name, tail = split_mention(part, existing)
+        if name in existing:
+            html.append(format_html(
+                '<a href="/profile/{}/">@{}</a>{}', name, name, tail))
+        else:
+            html.append(urlize(f'@{part}', autoescape=True))
+    html = linebreaksbr(''.join(html), autoescape=False)
+    return html, Truncator(html).words(EXCERPT_WORDS, html=True)
+
+
+def render_existing(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        last_pk = 0
+        while True:
+            rows = list(model.objects.filter(pk__gt=last_pk).order_by(
+                'pk').only('text')[:BATCH_SIZE])
+            if not rows:
+                break
+            names = set()
+            for row in rows:
+                for name in MENTION.findall(row.text):
+                    names.update((name, name.rstrip(MENTION_TAIL)))
+            existing = set(User.objects.filter(
+                username__in=names).values_list('username', flat=True))
+            for row in rows:
+                row.text_html, row.excerpt_html = render_text(
+                    row.text, existing)
+            model.objects.bulk_update(rows, ['text_html', 'excerpt_html'])
+            last_pk = rows[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_post_image_meta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML отрывка'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML отрывка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.PositiveIntegerField(db_index=True, verbose_name='Час от начала эпохи')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Комментарии')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_buckets', to='posts.Post')),
+            ],
+            options={
+                'verbose_name': 'Активность поста за час',
+                'verbose_name_plural': 'Активность постов по часам',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trendingbucket',
+            constraint=models.UniqueConstraint(fields=('post', 'hour'), name='one_bucket_per_hour'),
+        ),
+    ]
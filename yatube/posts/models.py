@@ -1,8 +1,18 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from .storage import post_images
 
 User = get_user_model()
 
+REACTIONS = (
+    ('like', '👍'),
+    ('love', '❤️'),
+    ('laugh', '😂'),
+)
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -14,14 +24,70 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class ImageMeta(models.Model):
+    """Сведения о картинке, посчитанные один раз при загрузке.
+
+    Заполняются в posts.images.process_post_image (для старых постов —
+    командой backfill_image_meta), чтобы шаблоны знали размеры и цвет
+    картинки, не открывая файл.
+    """
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False)
+    image_color = models.CharField(
+        'Основной цвет картинки', max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(
+        'Превью картинки (data URI)', blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def clear_image_meta(self):
+        self.image_width = self.image_height = None
+        self.image_color = self.image_placeholder = ''
+
+
+class RenderedText(models.Model):
+    """HTML текста и отрывка, подготовленный при сохранении.
+
+    Заполняется сигналом pre_save через posts.rendering. Строки,
+    созданные в обход save() (bulk_create, update), рендерятся при
+    обращении к html и excerpt.
+    """
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    excerpt_html = models.TextField(
+        'HTML отрывка', blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def render_text(self):
+        from .rendering import render_text
+        self.text_html, self.excerpt_html = render_text(self.text)
+
+    @property
+    def html(self):
+        if not self.text_html and self.text:
+            self.render_text()
+        return mark_safe(self.text_html)
+
+    @property
+    def excerpt(self):
+        if not self.excerpt_html and self.text:
+            self.render_text()
+        return mark_safe(self.excerpt_html)
+
+
+class Post(ImageMeta, RenderedText):
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
     )
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
     author = models.ForeignKey(
         User,
@@ -41,11 +107,22 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=post_images,
+        blank=True,
+        db_index=True
     )
+    views = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False)
 
     class Meta:
         ordering = ('-pub_date',)
+        # ленты автора и группы сортируются по дате внутри своей выборки
+        indexes = [
+            models.Index(fields=['author', '-pub_date'],
+                         name='post_author_date_idx'),
+            models.Index(fields=['group', '-pub_date'],
+                         name='post_group_date_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -72,6 +149,87 @@ class Comment(models.Model):
         ordering = ('-created',)
 
 
+class ArchivedPost(ImageMeta, RenderedText):
+    """Старый пост, перенесённый из posts_post командой archive_posts.
+
+    id совпадает с id исходного поста, поэтому ссылки на него не
+    меняются. Горячая таблица и её индексы остаются маленькими.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=post_images,
+        blank=True,
+        db_index=True
+    )
+    views = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False)
+    archived = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['author', '-pub_date'],
+                         name='archived_author_date_idx'),
+            models.Index(fields=['group', '-pub_date'],
+                         name='archived_group_date_idx'),
+        ]
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments'
+    )
+    text = models.TextField()
+    created = models.DateTimeField('creation date')
+
+    class Meta:
+        ordering = ('-created',)
+
+
+def post_link(related_name, **kwargs):
+    """Ссылка на пост, которая переживает его перенос в архив.
+
+    ArchivedPost сохраняет id поста, поэтому реакции, просмотры и
+    уведомления продолжают указывать на него. Ограничения внешнего ключа
+    в базе нет, а строки удаляет posts.archive.delete_post_data, когда
+    пост удаляют насовсем.
+    """
+    return models.ForeignKey(Post, on_delete=models.DO_NOTHING,
+                             db_constraint=False, related_name=related_name,
+                             **kwargs)
+
+
 class Follow(models.Model):
     objects = None
     user = models.ForeignKey(
@@ -95,3 +253,129 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'follower: {self.user} author: {self.author}'
+
+
+class TrendingBucket(models.Model):
+    """Число комментариев к посту за один час.
+
+    Пополняется в add_comment через posts.trending.record_comment и
+    сворачивается командой compact_trending в списки популярных постов.
+    """
+    post = post_link('trending_buckets')
+    hour = models.PositiveIntegerField('Час от начала эпохи', db_index=True)
+    comments = models.PositiveIntegerField('Комментарии', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'hour'],
+                                    name='one_bucket_per_hour'),
+        ]
+        verbose_name = 'Активность поста за час'
+        verbose_name_plural = 'Активность постов по часам'
+
+
+class Reaction(models.Model):
+    """Реакция пользователя на пост, не больше одной на пару.
+
+    Число реакций по видам хранится отдельно в ReactionCounter, см.
+    posts.reactions.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions'
+    )
+    post = post_link('reactions')
+    kind = models.CharField('Реакция', max_length=10, choices=REACTIONS)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='one_reaction'),
+        ]
+        verbose_name = 'Реакция'
+        verbose_name_plural = 'Реакции'
+
+
+class ReactionCounter(models.Model):
+    """Часть счётчика реакций одного вида на пост.
+
+    Счётчик популярного поста разбит на несколько строк, и одновременные
+    реакции обновляют разные строки. Итог — сумма частей, см.
+    posts.reactions.
+    """
+    post = post_link('reaction_counters')
+    kind = models.CharField('Реакция', max_length=10, choices=REACTIONS)
+    shard = models.PositiveSmallIntegerField('Часть')
+    count = models.IntegerField('Число', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'kind', 'shard'],
+                                    name='one_reaction_shard'),
+        ]
+
+
+class PostViews(models.Model):
+    """Просмотры поста за день, а после compact_views — за месяц."""
+    post = post_link('view_history')
+    day = models.DateField('День', db_index=True)
+    views = models.PositiveIntegerField('Просмотры', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'day'],
+                                    name='one_views_row_per_day'),
+        ]
+        verbose_name = 'Просмотры за день'
+        verbose_name_plural = 'История просмотров'
+
+
+class Notification(models.Model):
+    """Уведомление во входящих пользователя.
+
+    Пока уведомление не прочитано, новые события той же темы (topic) не
+    создают строк, а увеличивают count: «37 новых комментариев» — одна
+    строка. Создаются фоновыми задачами из posts.notifications.
+    """
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    KINDS = (
+        (COMMENT, 'Комментарий'),
+        (FOLLOW, 'Подписка'),
+    )
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    kind = models.CharField('Вид', max_length=10, choices=KINDS)
+    topic = models.CharField('Тема', max_length=50)
+    post = post_link('notifications', blank=True, null=True,
+                     verbose_name='Пост')
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        blank=True,
+        null=True,
+        verbose_name='Последний участник'
+    )
+    count = models.PositiveIntegerField('Событий', default=1)
+    updated = models.DateTimeField('Последнее событие', default=timezone.now)
+    is_read = models.BooleanField('Прочитано', default=False)
+
+    class Meta:
+        ordering = ('-updated',)
+        constraints = [
+            models.UniqueConstraint(fields=['recipient', 'topic'],
+                                    condition=models.Q(is_read=False),
+                                    name='one_unread_per_topic'),
+        ]
+        indexes = [
+            models.Index(fields=['recipient', '-updated'],
+                         name='notification_inbox_idx'),
+        ]
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
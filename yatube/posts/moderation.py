@@ -0,0 +1,193 @@
+"""Массовая модерация из админки фоновыми пачками.
+
+Действие админки только ставит задачу (core.tasks.schedule) и сразу
+отвечает ссылкой на страницу прогресса. Задача обрабатывает строки
+пачками по BATCH_SIZE первичных ключей, каждую пачку в своей
+транзакции, поэтому блокировки короткие, а прерванную задачу можно
+просто запустить заново. Прогресс хранится в кэше.
+
+Посты и комментарии удаляются одним DELETE на таблицу по списку pk, в
+обход Collector: из-за приёмников post_delete он загрузил бы каждую
+строку в память. То, что делают приёмники (освобождение картинок,
+сброс кэшей, удаление реакций и просмотров), здесь делается сразу для
+всей пачки.
+"""
+import logging
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from core.tasks import PRIORITY_LOW, schedule
+from .archive import delete_post_data
+from .caching import (
+    invalidate_comments, invalidate_posts, invalidate_profile_header,
+)
+from .images import release_image
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Notification, Post,
+    Reaction, User,
+)
+from .reactions import withdraw
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+PROGRESS_TIMEOUT = 24 * 60 * 60
+
+
+def _progress_key(job_id):
+    return f'moderation:{job_id}'
+
+
+def get_progress(job_id):
+    return cache.get(_progress_key(job_id))
+
+
+def _set_progress(job_id, **changes):
+    progress = get_progress(job_id) or {}
+    progress.update(changes)
+    cache.set(_progress_key(job_id), progress, PROGRESS_TIMEOUT)
+
+
+def start(title, task, *args):
+    """Ставит задачу модерации и возвращает её id для страницы прогресса."""
+    job_id = uuid.uuid4().hex
+    _set_progress(job_id, title=title, state='queued', done=0, total=None)
+    schedule(task, [job_id, *args], priority=PRIORITY_LOW)
+    return job_id
+
+
+def _run_steps(job_id, steps):
+    """Выполняет шаги (queryset, apply) по очереди пачками pk.
+
+    Каждый apply вызывается, пока его queryset не перестанет давать pk,
+    поэтому apply обязан убрать обработанные строки из queryset
+    (удалить или изменить), иначе выборка не закончится. Прогресс
+    считается по всем шагам сразу.
+    """
+    steps = [(queryset.order_by('pk'), apply) for queryset, apply in steps]
+    _set_progress(job_id, state='running',
+                  total=sum(queryset.count() for queryset, _ in steps))
+    done = 0
+    try:
+        for queryset, apply in steps:
+            while True:
+                pks = list(
+                    queryset.values_list('pk', flat=True)[:BATCH_SIZE])
+                if not pks:
+                    break
+                with transaction.atomic():
+                    apply(pks)
+                done += len(pks)
+                _set_progress(job_id, done=done)
+    except Exception:
+        logger.exception('Задача модерации %s прервана', job_id)
+        _set_progress(job_id, state='failed')
+        raise
+    finally:
+        invalidate_posts()
+    _set_progress(job_id, state='done')
+
+
+def _run_batches(job_id, queryset, apply):
+    _run_steps(job_id, [(queryset, apply)])
+
+
+def _deleter(model):
+    def apply(pks):
+        model.objects.filter(pk__in=pks).delete()
+    return apply
+
+
+def _raw_delete(queryset):
+    queryset._raw_delete(queryset.db)
+
+
+def _post_deleter(model, comment_model):
+    """Удаляет пачку постов model с комментариями без загрузки строк.
+
+    Запросов на пачку всегда одинаково: два SELECT имён картинок и
+    авторов и по одному DELETE на таблицу.
+    """
+    def apply(pks):
+        posts = model.objects.filter(pk__in=pks).order_by()
+        images = set(posts.exclude(image='').values_list('image', flat=True))
+        authors = set(posts.values_list('author__username', flat=True))
+        _raw_delete(comment_model.objects.filter(post_id__in=pks))
+        delete_post_data(pks)
+        _raw_delete(posts)
+        invalidate_profile_header(*authors)
+
+        def after_commit():
+            invalidate_profile_header(*authors)
+            for image in images:
+                release_image(image)
+        transaction.on_commit(after_commit)
+    return apply
+
+
+def _delete_comments(pks):
+    comments = Comment.objects.filter(pk__in=pks).order_by()
+    post_ids = set(comments.values_list('post_id', flat=True))
+    _raw_delete(comments)
+    invalidate_comments(*post_ids)
+    transaction.on_commit(lambda: invalidate_comments(*post_ids))
+
+
+def delete_posts_by_authors(job_id, author_ids):
+    _run_batches(job_id, Post.objects.filter(author_id__in=author_ids),
+                 _post_deleter(Post, Comment))
+
+
+def move_posts_to_group(job_id, post_ids, group_id):
+    def apply(pks):
+        Post.objects.filter(pk__in=pks).update(group_id=group_id)
+
+    queryset = Post.objects.filter(pk__in=post_ids)
+    if group_id is None:
+        queryset = queryset.exclude(group__isnull=True)
+    else:
+        queryset = queryset.exclude(group_id=group_id)
+    _run_batches(job_id, queryset, apply)
+
+
+def purge_comments(job_id, texts):
+    _run_batches(job_id, Comment.objects.filter(text__in=texts),
+                 _delete_comments)
+
+
+def _clear_actor(pks):
+    # Уведомления других людей остаются, как при SET_NULL у actor.
+    Notification.objects.filter(pk__in=pks).update(actor=None)
+
+
+def delete_users(job_id, user_ids):
+    """Удаляет пользователей со всем их содержимым пачками.
+
+    Сначала уходят строки, которыми пользователи задевают чужое
+    (подписки, реакции, уведомления, комментарии), потом архив и посты
+    вместе с их комментариями и картинками, и только в конце сами
+    User. Их удаляет обычный каскад Django: он по-прежнему проверяет
+    каждую связанную таблицу, но строк там уже нет. Прерванную задачу
+    можно запустить заново с тем же списком.
+    """
+    User.objects.filter(pk__in=user_ids).update(is_active=False)
+    _run_steps(job_id, [
+        (Follow.objects.filter(
+            Q(user_id__in=user_ids) | Q(author_id__in=user_ids)),
+         _deleter(Follow)),
+        (Reaction.objects.filter(user_id__in=user_ids), withdraw),
+        (Notification.objects.filter(recipient_id__in=user_ids),
+         _deleter(Notification)),
+        (Notification.objects.filter(actor_id__in=user_ids), _clear_actor),
+        (Comment.objects.filter(author_id__in=user_ids), _delete_comments),
+        (ArchivedComment.objects.filter(author_id__in=user_ids),
+         _deleter(ArchivedComment)),
+        (ArchivedPost.objects.filter(author_id__in=user_ids),
+         _post_deleter(ArchivedPost, ArchivedComment)),
+        (Post.objects.filter(author_id__in=user_ids),
+         _post_deleter(Post, Comment)),
+        (User.objects.filter(pk__in=user_ids), _deleter(User)),
+    ])
@@ -0,0 +1,84 @@
+"""Уведомления о комментариях и подписках.
+
+add_comment и profile_follow только ставят задачу (core.tasks.enqueue),
+а рассылает её fan_out в фоне: получатели обрабатываются пачками по
+FANOUT_BATCH, у тех, кто ещё не прочитал уведомление этой темы, одним
+UPDATE растёт count, остальным одним INSERT создаются новые строки.
+
+Число непрочитанных для шапки лежит в кэше и сбрасывается, когда у
+пользователя появляется или читается уведомление.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Comment, Notification
+
+FANOUT_BATCH = 500
+UNREAD_TIMEOUT = 10 * 60
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    return cache.get_or_set(
+        unread_key(user_id),
+        lambda: Notification.objects.filter(
+            recipient_id=user_id, is_read=False).count(),
+        UNREAD_TIMEOUT)
+
+
+def mark_read(user_id):
+    """Отмечает все уведомления пользователя прочитанными."""
+    Notification.objects.filter(
+        recipient_id=user_id, is_read=False).update(is_read=True)
+    cache.delete(unread_key(user_id))
+
+
+def fan_out(recipient_ids, kind, topic, actor_id, post_id=None):
+    """Добавляет событие темы topic во входящие получателей.
+
+    Самому участнику события уведомление не приходит.
+    """
+    recipient_ids = sorted(set(recipient_ids) - {actor_id})
+    now = timezone.now()
+    for start in range(0, len(recipient_ids), FANOUT_BATCH):
+        batch = recipient_ids[start:start + FANOUT_BATCH]
+        unread = Notification.objects.filter(
+            recipient_id__in=batch, topic=topic, is_read=False)
+        with transaction.atomic():
+            existing = set(unread.values_list('recipient_id', flat=True))
+            unread.update(count=F('count') + 1, actor_id=actor_id,
+                          updated=now)
+            new = [recipient for recipient in batch
+                   if recipient not in existing]
+            # Строку, созданную параллельной задачей, не дублируем.
+            Notification.objects.bulk_create([
+                Notification(recipient_id=recipient, kind=kind, topic=topic,
+                             post_id=post_id, actor_id=actor_id,
+                             updated=now)
+                for recipient in new
+            ], ignore_conflicts=True)
+        cache.delete_many([unread_key(recipient) for recipient in new])
+
+
+def notify_comment(comment_id):
+    """Автору поста и прежним комментаторам: новый комментарий."""
+    comment = Comment.objects.select_related('post').filter(
+        pk=comment_id).first()
+    if comment is None:
+        return
+    post = comment.post
+    recipients = set(Comment.objects.filter(post=post).order_by().values_list(
+        'author_id', flat=True).distinct())
+    recipients.add(post.author_id)
+    fan_out(recipients, Notification.COMMENT, f'comment:{post.pk}',
+            comment.author_id, post.pk)
+
+
+def notify_follow(user_id, author_id):
+    """Автору: новый подписчик."""
+    fan_out([author_id], Notification.FOLLOW, 'follow', user_id)
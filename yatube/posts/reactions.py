@@ -0,0 +1,124 @@
+"""Реакции на посты со счётчиками, разбитыми на части.
+
+Кто как отреагировал, хранит Reaction с уникальной парой (user, post):
+повторный клик не создаёт вторую реакцию. Числа по видам лежат в
+ReactionCounter: каждое изменение прибавляет +1 или -1 к случайной из
+COUNTER_SHARDS частей, поэтому реакции на популярный пост не ждут друг
+друга на одной строке. Отдельная часть может уйти в минус, сумма
+всегда верна.
+
+Ленты читают суммы для всей страницы одним запросом (attach_reactions),
+страница поста получает их подзапросами в своём запросе
+(with_reactions).
+"""
+import random
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import REACTIONS, Reaction, ReactionCounter
+
+COUNTER_SHARDS = 8
+EMOJI = dict(REACTIONS)
+
+
+def _add(post_id, kind, delta):
+    shard = random.randrange(COUNTER_SHARDS)
+    counters = ReactionCounter.objects.filter(
+        post_id=post_id, kind=kind, shard=shard)
+    if counters.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ReactionCounter.objects.create(
+                post_id=post_id, kind=kind, shard=shard, count=delta)
+    except IntegrityError:
+        counters.update(count=F('count') + delta)
+
+
+@transaction.atomic
+def react(user, post_id, kind):
+    """Ставит, меняет или снимает реакцию пользователя.
+
+    Та же реакция ещё раз снимает её. Возвращает вид реакции после
+    изменения или None. Каждое изменение Reaction условное, поэтому
+    двойной клик из двух запросов меняет счётчики один раз.
+    """
+    current = Reaction.objects.filter(
+        user=user, post_id=post_id).values_list('kind', flat=True).first()
+    if current is None:
+        try:
+            with transaction.atomic():
+                Reaction.objects.create(user=user, post_id=post_id, kind=kind)
+        except IntegrityError:
+            return None
+        _add(post_id, kind, 1)
+        return kind
+    mine = Reaction.objects.filter(user=user, post_id=post_id, kind=current)
+    if current == kind:
+        if mine.delete()[0]:
+            _add(post_id, kind, -1)
+        return None
+    if mine.update(kind=kind):
+        _add(post_id, current, -1)
+        _add(post_id, kind, 1)
+    return kind
+
+
+def withdraw(reaction_ids):
+    """Удаляет реакции и вычитает их из счётчиков постов.
+
+    Для удаления пользователя: он больше не кликнет, поэтому гонки с
+    react здесь нет.
+    """
+    reactions = Reaction.objects.filter(pk__in=reaction_ids)
+    removed = Counter(reactions.values_list('post_id', 'kind'))
+    reactions.delete()
+    for (post_id, kind), count in removed.items():
+        _add(post_id, kind, -count)
+
+
+def _counts(totals):
+    """[(эмодзи, число), ...] в порядке REACTIONS без нулевых."""
+    return [(EMOJI[kind], totals[kind]) for kind, _ in REACTIONS
+            if totals.get(kind)]
+
+
+def reaction_counts(post_ids):
+    """Суммы реакций по видам для нескольких постов одним запросом."""
+    totals = defaultdict(dict)
+    rows = ReactionCounter.objects.filter(post_id__in=post_ids).order_by(
+    ).values_list('post_id', 'kind').annotate(total=Sum('count'))
+    for post_id, kind, total in rows:
+        totals[post_id][kind] = total
+    return {post_id: _counts(kinds) for post_id, kinds in totals.items()}
+
+
+def attach_reactions(posts):
+    """Проставляет постам страницы reaction_counts."""
+    counts = reaction_counts([post.pk for post in posts])
+    for post in posts:
+        post.reaction_counts = counts.get(post.pk, [])
+
+
+def with_reactions(queryset, user):
+    """Посты с суммой каждого вида реакций и реакцией user в аннотациях."""
+    annotations = {}
+    for kind, _ in REACTIONS:
+        total = ReactionCounter.objects.filter(
+            post=OuterRef('pk'), kind=kind).order_by().values(
+            'post').annotate(total=Sum('count')).values('total')
+        annotations[f'reactions_{kind}'] = Coalesce(
+            Subquery(total, output_field=IntegerField()), 0)
+    if user.is_authenticated:
+        annotations['my_reaction'] = Subquery(Reaction.objects.filter(
+            post=OuterRef('pk'), user=user).values('kind')[:1])
+    return queryset.annotate(**annotations)
+
+
+def reaction_buttons(post):
+    """[(вид, эмодзи, число), ...] для кнопок поста из with_reactions."""
+    return [(kind, emoji, getattr(post, f'reactions_{kind}'))
+            for kind, emoji in REACTIONS]
@@ -0,0 +1,76 @@
+"""HTML текста постов, который готовится при сохранении.
+
+Рендерер — функция text -> безопасный HTML, путь к ней задаёт
+POSTS_TEXT_RENDERER. Стандартный экранирует текст, превращает ссылки в
+<a rel="nofollow">, упоминания @username существующих пользователей — в
+ссылки на профиль, а переводы строк — в <br>.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.template.defaultfilters import linebreaksbr
+from django.urls import reverse
+from django.utils.html import format_html, urlize
+from django.utils.module_loading import import_string
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 60
+# @ внутри адресов почты и ссылок (user@mail.ru, site.ru/@user) не
+# считается упоминанием.
+MENTION = re.compile(r'(?<![\w@/.])@([\w.+-]+)')
+# Символы, которые в конце упоминания скорее пунктуация: «спасибо @alice.»
+MENTION_TAIL = '.+-'
+
+_renderer = None
+
+
+def get_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = import_string(settings.POSTS_TEXT_RENDERER)
+    return _renderer
+
+
+def _split_mention(name, existing):
+    """Пара (имя пользователя, хвост) для упоминания @name.
+
+    Если пользователя name нет, а без точки или дефиса в конце он есть,
+    эти символы возвращаются хвостом — текстом после ссылки.
+    """
+    if name not in existing:
+        stripped = name.rstrip(MENTION_TAIL)
+        if stripped in existing:
+            return stripped, name[len(stripped):]
+    return name, ''
+
+
+def default_renderer(text):
+    parts = MENTION.split(text)
+    # split с группой чередует обычный текст и имена пользователей
+    names = set(parts[1::2])
+    names |= {name.rstrip(MENTION_TAIL) for name in names}
+    existing = set()
+    if names:
+        existing = set(get_user_model().objects.filter(
+            username__in=names).values_list('username', flat=True))
+    html = []
+    for number, part in enumerate(parts):
+        if number % 2 == 0:
+            html.append(urlize(part, nofollow=True, autoescape=True))
+            continue
+        name, tail = _split_mention(part, existing)
+        if name in existing:
+            html.append(format_html(
+                '<a href="{}">@{}</a>{}',
+                reverse('posts:profile', args=[name]), name, tail))
+        else:
+            html.append(urlize(f'@{part}', autoescape=True))
+    return linebreaksbr(''.join(html), autoescape=False)
+
+
+def render_text(text):
+    """Возвращает пару (полный HTML, HTML отрывка для лент)."""
+    html = get_renderer()(text)
+    excerpt = Truncator(html).words(EXCERPT_WORDS, html=True)
+    return html, excerpt
@@ -0,0 +1,223 @@
+"""Лёгкие строки постов для лент.
+
+Ленте нужны дата, отрывок, картинка, имя автора и группа. Модели Post и
+User ради этого читают все колонки, включая полный текст и хэш пароля,
+и на каждую строку создают по экземпляру модели с _state и кэшами
+связей. FeedRows выбирает только нужные колонки через values_list и
+раскладывает их по объектам со __slots__; автор и группа, повторяющиеся
+на странице, создаются один раз.
+
+Строки только для чтения: сохранять их нельзя, а полный текст читается
+отдельным запросом при обращении к text.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Case, F, TextField, Value, When
+from django.utils.safestring import mark_safe
+
+from .models import Group
+from .rendering import render_text
+
+User = get_user_model()
+
+FEED_FIELDS = (
+    'id', 'pub_date', 'excerpt_html',
+    'image', 'image_width', 'image_height', 'image_color',
+    'image_placeholder',
+    'author_id', 'author__username', 'author__first_name',
+    'author__last_name',
+    'group_id', 'group__title', 'group__slug', 'unrendered_text',
+)
+# Строки из bulk_create ещё не отрендерены (см. RenderedText): только
+# для них вместе со строкой приходит полный текст.
+UNRENDERED_TEXT = Case(
+    When(excerpt_html='', then=F('text')),
+    default=Value(''),
+    output_field=TextField(),
+)
+
+
+class ImageRef:
+    """Имя файла и хранилище: всё, что шаблонам и sorl нужно от FieldFile."""
+
+    __slots__ = ('name', 'storage')
+
+    def __init__(self, name, storage):
+        self.name = name
+        self.storage = storage
+
+    def __bool__(self):
+        return bool(self.name)
+
+    def __str__(self):
+        return self.name or ''
+
+    def __eq__(self, other):
+        return self.name == getattr(other, 'name', other)
+
+    def __hash__(self):
+        return hash(self.name)
+
+    @property
+    def url(self):
+        return self.storage.url(self.name)
+
+
+class AuthorRow:
+    __slots__ = ('pk', 'username', 'first_name', 'last_name')
+
+    def __init__(self, pk, username, first_name, last_name):
+        self.pk = pk
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return self.username
+
+    def __eq__(self, other):
+        if not isinstance(other, (AuthorRow, User)):
+            return NotImplemented
+        return self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+
+class GroupRow:
+    __slots__ = ('pk', 'title', 'slug')
+
+    def __init__(self, pk, title, slug):
+        self.pk = pk
+        self.title = title
+        self.slug = slug
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return self.title
+
+    def __eq__(self, other):
+        if not isinstance(other, (GroupRow, Group)):
+            return NotImplemented
+        return self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class PostRow:
+    __slots__ = (
+        'model', 'pk', 'pub_date', 'excerpt_html', 'image', 'image_width',
+        'image_height', 'image_color', 'image_placeholder', 'author',
+        'group', 'reaction_counts', '_text',
+    )
+
+    def __init__(self, model, pk, pub_date, excerpt_html, image,
+                 image_width, image_height, image_color, image_placeholder,
+                 author, group):
+        self.model = model
+        self.pk = pk
+        self.pub_date = pub_date
+        self.excerpt_html = excerpt_html
+        self.image = image
+        self.image_width = image_width
+        self.image_height = image_height
+        self.image_color = image_color
+        self.image_placeholder = image_placeholder
+        self.author = author
+        self.group = group
+        self.reaction_counts = []
+        self._text = None
+
+    @property
+    def id(self):
+        return self.pk
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.model.objects.values_list(
+                'text', flat=True).get(pk=self.pk)
+        return self._text
+
+    @property
+    def excerpt(self):
+        return mark_safe(self.excerpt_html)
+
+    def __eq__(self, other):
+        if isinstance(other, PostRow):
+            return (self.model, self.pk) == (other.model, other.pk)
+        if isinstance(other, self.model):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+def post_rows(queryset):
+    """Список PostRow для queryset постов или архивных постов."""
+    model = queryset.model
+    storage = model._meta.get_field('image').storage
+    authors = {}
+    groups = {}
+    rows = []
+    for (pk, pub_date, excerpt_html, image, image_width, image_height,
+         image_color, image_placeholder, author_id, username, first_name,
+         last_name, group_id, title, slug, text) in queryset.annotate(
+            unrendered_text=UNRENDERED_TEXT).values_list(*FEED_FIELDS):
+        author = authors.get(author_id)
+        if author is None:
+            author = authors[author_id] = AuthorRow(
+                author_id, username, first_name, last_name)
+        group = None
+        if group_id is not None:
+            group = groups.get(group_id)
+            if group is None:
+                group = groups[group_id] = GroupRow(group_id, title, slug)
+        if not excerpt_html and text:
+            excerpt_html = render_text(text)[1]
+        row = PostRow(
+            model, pk, pub_date, excerpt_html, ImageRef(image, storage),
+            image_width, image_height, image_color, image_placeholder,
+            author, group,
+        )
+        if text:
+            row._text = text
+        rows.append(row)
+    return rows
+
+
+class FeedRows:
+    """Queryset постов для Paginator, который отдаёт PostRow.
+
+    COUNT и сортировка берутся из queryset как есть, а срез читает
+    только колонки FEED_FIELDS.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @property
+    def ordered(self):
+        return self.queryset.ordered
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        return post_rows(self.queryset[index])
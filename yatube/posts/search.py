@@ -0,0 +1,118 @@
+"""Полнотекстовый поиск по постам.
+
+В SQLite текст постов индексируется в FTS5-таблице posts_post_fts
+(external content: хранится только индекс, текст берётся из posts_post),
+которую поддерживают триггеры. SQLite пересоздаёт таблицу posts_post
+при изменении её схемы, и триггеры пропадают вместе со старой таблицей,
+поэтому ensure_fts() выполняется после каждой миграции. На других базах
+и на SQLite без FTS5 поиск остаётся обычным icontains.
+"""
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'posts_post_fts'
+
+FTS_CREATE_TABLE = f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    text, content='posts_post', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)"""
+
+FTS_TRIGGERS = {
+    'posts_post_fts_insert': f"""CREATE TRIGGER posts_post_fts_insert
+    AFTER INSERT ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    'posts_post_fts_delete': f"""CREATE TRIGGER posts_post_fts_delete
+    AFTER DELETE ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    'posts_post_fts_update': f"""CREATE TRIGGER posts_post_fts_update
+    AFTER UPDATE OF text ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+}
+
+
+def fts_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def _existing(cursor, kind):
+    cursor.execute('SELECT name FROM sqlite_master WHERE type = %s', [kind])
+    return {name for name, in cursor.fetchall()}
+
+
+def fts_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        return FTS_TABLE in _existing(cursor, 'table')
+
+
+def ensure_fts(connection):
+    """Создаёт недостающие таблицу и триггеры FTS и переиндексирует посты.
+
+    Ничего не делает, если всё на месте.
+    """
+    if not fts_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        tables = _existing(cursor, 'table')
+        if 'posts_post' not in tables:
+            return
+        triggers = _existing(cursor, 'trigger')
+        missing = [sql for name, sql in FTS_TRIGGERS.items()
+                   if name not in triggers]
+        if FTS_TABLE in tables and not missing:
+            return
+        if FTS_TABLE not in tables:
+            cursor.execute(FTS_CREATE_TABLE)
+        for sql in missing:
+            cursor.execute(sql)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_fts(connection):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def match_expression(term):
+    """Превращает ввод пользователя в запрос FTS5 по префиксам слов.
+
+    Каждое слово берётся в кавычки, поэтому операторы и спецсимволы
+    FTS5 во вводе не дают синтаксических ошибок.
+    """
+    words = term.split()
+    return ' '.join('"{}"*'.format(word.replace('"', '""'))
+                    for word in words)
+
+
+def search_posts(queryset, term):
+    """Фильтрует queryset постов по словам из term."""
+    connection = connections[queryset.db]
+    if not term.split():
+        return queryset
+    if not fts_available(connection):
+        for word in term.split():
+            queryset = queryset.filter(text__icontains=word)
+        return queryset
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match_expression(term)],
+    ))
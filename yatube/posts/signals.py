@@ -0,0 +1,78 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .archive import delete_post_data
+from .images import ensure_image, release_image
+from .caching import invalidate_comments, invalidate_profile_header
+from .models import ArchivedPost, Comment, Post, User
+from .search import ensure_fts
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_image(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._old_image = Post.objects.filter(
+            pk=instance.pk).values_list('image', flat=True).first()
+    if instance.image and not instance.image._committed:
+        instance._new_image = instance.image.file
+
+
+@receiver(pre_save, sender=Post)
+def render_post_text(sender, instance, **kwargs):
+    instance.render_text()
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    old_image = getattr(instance, '_old_image', None)
+    if old_image and old_image != instance.image.name:
+        transaction.on_commit(lambda: release_image(old_image))
+
+
+@receiver(post_save, sender=Post)
+def keep_uploaded_image(sender, instance, **kwargs):
+    content = instance.__dict__.pop('_new_image', None)
+    if content is not None:
+        name = instance.image.name
+        transaction.on_commit(lambda: ensure_image(name, content))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def release_deleted_image(sender, instance, **kwargs):
+    image = instance.image.name
+    if image:
+        transaction.on_commit(lambda: release_image(image))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def delete_linked_rows(sender, instance, **kwargs):
+    # Внешние ключи post_link не каскадные, см. posts.models.post_link.
+    delete_post_data([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def drop_cached_profile_header(sender, instance, **kwargs):
+    # Удаление из админки или каскадом меняет «Всего постов» в шапке.
+    username = User.objects.filter(pk=instance.author_id).values_list(
+        'username', flat=True).first()
+    if username:
+        invalidate_profile_header(username)
+        transaction.on_commit(lambda: invalidate_profile_header(username))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def drop_cached_comments(sender, instance, **kwargs):
+    post_id = instance.post_id
+    # Второй раз после коммита: параллельный запрос мог успеть положить
+    # в кэш список без этого изменения.
+    invalidate_comments(post_id)
+    transaction.on_commit(lambda: invalidate_comments(post_id))
+
+
+def restore_search_index(sender, using, **kwargs):
+    # Подключается к post_migrate в PostsConfig.ready().
+    ensure_fts(connections[using])
@@ -0,0 +1,16 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def fit_width(post, width):
+    """Размер картинки поста, вписанной по ширине в width без увеличения.
+
+    Считается по сохранённым image_width и image_height; пока их нет,
+    возвращает None.
+    """
+    if not post.image_width or not post.image_height:
+        return None
+    width = min(int(width), post.image_width)
+    return width, round(post.image_height * width / post.image_width)
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.paginator import EstimatedCountPaginator, estimate_count
+from posts import search
+from posts.archive import archive_posts
+from posts.models import ArchivedPost, Group, Post, User
+
+CHANGELIST = 'admin:posts_post_changelist'
+POSTS_COUNT = 30
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='x')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create([
+            Post(text=f'Пост номер {number}', author=cls.admin,
+                 group=cls.group)
+            for number in range(POSTS_COUNT)
+        ])
+        Post.objects.create(text='Ёжик в тумане', author=cls.admin)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_changelist_skips_full_count(self):
+        """Список постов не считает таблицу целиком и не делает N+1."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(CHANGELIST))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        sql = [query['sql'] for query in queries]
+        # Считается не дальше COUNT_LIMIT строк, дальше — статистика.
+        self.assertFalse(any('COUNT(*)' in query and 'posts_post' in query
+                             and 'LIMIT' not in query for query in sql))
+        # Автор загружается один раз middleware, а не для каждой строки.
+        self.assertEqual(
+            sum('WHERE "auth_user"."id" =' in query for query in sql), 1)
+
+    def test_search_uses_fulltext_index(self):
+        """Поиск находит посты по префиксам слов без учёта регистра."""
+        if search.fts_supported(connection):
+            self.assertTrue(search.fts_available(connection))
+        response = self.client.get(reverse(CHANGELIST), {'q': 'ЁЖИК туман'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         list(Post.objects.filter(text__startswith='Ёжик')))
+
+    def test_search_index_follows_updates(self):
+        """Изменённый и удалённый пост выпадают из поиска."""
+        post = Post.objects.get(text='Ёжик в тумане')
+        post.text = 'Медвежонок'
+        post.save()
+        self.assertFalse(search.search_posts(Post.objects.all(),
+                                             'ёжик').exists())
+        self.assertTrue(search.search_posts(Post.objects.all(),
+                                            'медвеж').exists())
+        post.delete()
+        self.assertFalse(search.search_posts(Post.objects.all(),
+                                             'медвеж').exists())
+
+    def test_match_expression_escapes_operators(self):
+        """Операторы FTS5 во вводе становятся обычными словами."""
+        self.assertEqual(search.match_expression('a" OR b*'),
+                         '"a"""* "OR"* "b*"*')
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='test-username')
+        Post.objects.bulk_create([
+            Post(text=f'Пост {number}', author=author)
+            for number in range(POSTS_COUNT)
+        ])
+
+    def test_pages_match_plain_slicing(self):
+        """Страницы совпадают с обычной нарезкой queryset."""
+        queryset = Post.objects.order_by('-pk')
+        paginator = EstimatedCountPaginator(queryset, 7)
+        self.assertGreaterEqual(paginator.count, POSTS_COUNT)
+        self.assertEqual(list(paginator.page(2).object_list),
+                         list(queryset[7:14]))
+
+    def test_count_ignores_deleted_rows(self):
+        """Удалённые строки не попадают в число строк таблицы."""
+        pks = Post.objects.order_by('pk').values_list('pk', flat=True)
+        Post.objects.filter(pk__lte=pks[POSTS_COUNT - 5]).delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, 4)
+
+    def test_large_table_uses_statistics(self):
+        """Большую таблицу оценивает статистика, обновлённая архивацией."""
+        pks = Post.objects.order_by('pk').values_list('pk', flat=True)
+        Post.objects.filter(pk__lte=pks[19]).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        with mock.patch('core.paginator.COUNT_LIMIT', 3):
+            archive_posts(timezone.now() - timedelta(days=365))
+            self.assertEqual(
+                EstimatedCountPaginator(Post.objects.all(), 10).count,
+                POSTS_COUNT - 20)
+            self.assertEqual(estimate_count(ArchivedPost.objects.all()), 20)
+
+    def test_filtered_count_exact(self):
+        """С фильтром число строк считается точно."""
+        queryset = Post.objects.filter(text__endswith='1')
+        self.assertEqual(EstimatedCountPaginator(queryset, 10).count,
+                         queryset.count())
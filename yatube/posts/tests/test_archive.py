@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.paginator import QuerySetChain
+from posts.archive import archive_posts
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Notification, Post, PostViews,
+    Reaction, User,
+)
+from posts.reactions import react, reaction_counts
+from posts.viewcount import flush_views
+
+USERNAME = 'test-username'
+POSTS_PER_PAGE = 10
+OLD_POSTS = 12
+NEW_POSTS = 5
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        now = timezone.now()
+        for number in range(OLD_POSTS + NEW_POSTS):
+            post = Post.objects.create(text=f'Пост {number}', author=cls.user)
+            age = 400 - number if number < OLD_POSTS else number
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(days=age))
+        cls.old_post = Post.objects.order_by('pub_date').first()
+        Comment.objects.create(post=cls.old_post, author=cls.user,
+                               text='Старый комментарий')
+        cls.before = now - timedelta(days=365)
+
+    def test_archive_moves_posts_and_comments(self):
+        """Старые посты и их комментарии переезжают в архив с теми же id."""
+        self.assertEqual(archive_posts(self.before, batch_size=5), OLD_POSTS)
+        self.assertEqual(Post.objects.count(), NEW_POSTS)
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived.text, self.old_post.text)
+        self.assertEqual(archived.pub_date, self.old_post.pub_date)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedComment.objects.get().post, archived)
+
+    def test_profile_continues_into_archive(self):
+        """Лента профиля после свежих постов продолжается архивом."""
+        before = list(Post.objects.filter(author=self.user))
+        archive_posts(self.before)
+        client = Client()
+        url = reverse('posts:profile', args=[USERNAME])
+        pages = [client.get(url, {'page': page}).context['page_obj']
+                 for page in (1, 2)]
+        self.assertEqual(pages[0].paginator.count, OLD_POSTS + NEW_POSTS)
+        shown = [post.pk for page in pages for post in page]
+        self.assertEqual(shown, [post.pk for post in before])
+        self.assertIs(pages[0][NEW_POSTS].model, ArchivedPost)
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по старой ссылке без формы комментария."""
+        archive_posts(self.before)
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('posts:post_detail', args=[self.old_post.pk]))
+        self.assertTrue(response.context['is_archived'])
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotContains(
+            response,
+            reverse('posts:add_comment', args=[self.old_post.pk]))
+
+    def test_archive_keeps_reactions_and_views(self):
+        """Реакции, просмотры и уведомления переживают перенос в архив."""
+        pk = self.old_post.pk
+        react(self.user, pk, 'like')
+        flush_views({pk: 3})
+        Notification.objects.create(recipient=self.user, kind='comment',
+                                    topic=f'comments:{pk}', post_id=pk)
+        archive_posts(self.before)
+        self.assertEqual(reaction_counts([pk]), {pk: [('👍', 1)]})
+        self.assertEqual(ArchivedPost.objects.get(pk=pk).views, 3)
+        self.assertEqual(PostViews.objects.get(post_id=pk).views, 3)
+        self.assertTrue(Notification.objects.filter(post_id=pk).exists())
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('posts:notifications'))
+        self.assertContains(
+            response, reverse('posts:post_detail', args=[pk]))
+
+        ArchivedPost.objects.get(pk=pk).delete()
+        self.assertFalse(Reaction.objects.filter(post_id=pk).exists())
+        self.assertEqual(reaction_counts([pk]), {})
+        self.assertFalse(PostViews.objects.filter(post_id=pk).exists())
+        self.assertFalse(Notification.objects.filter(post_id=pk).exists())
+
+    def test_command(self):
+        """Команда archive_posts сообщает число перенесённых постов."""
+        out = StringIO()
+        call_command('archive_posts', days=365, stdout=out)
+        self.assertIn(str(OLD_POSTS), out.getvalue())
+
+
+class QuerySetChainTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username=USERNAME)
+        Post.objects.bulk_create(
+            [Post(text=str(number), author=author) for number in range(7)])
+
+    def test_slices_cross_boundary(self):
+        """Срез на стыке берёт хвост первого и начало второго queryset."""
+        posts = Post.objects.order_by('pk')
+        chain = QuerySetChain(posts.filter(pk__lte=posts[2].pk),
+                              posts.filter(pk__gt=posts[2].pk))
+        self.assertEqual(chain.count(), 7)
+        self.assertEqual(chain[2:5], list(posts[2:5]))
+        self.assertEqual(chain[6], posts[6])
+        self.assertEqual(chain[5:], list(posts[5:]))
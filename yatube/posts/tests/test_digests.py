@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.digests import build_digests
+from posts.models import Follow, Post, User
+
+READERS = 6
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    MAIL_QUEUE_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SITE_URL='http://yatube.test',
+)
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tolstoy = User.objects.create_user(
+            username='tolstoy', first_name='Лев', last_name='Толстой')
+        cls.chekhov = User.objects.create_user(username='chekhov')
+        cls.quiet = User.objects.create_user(username='quiet')
+        cls.war = Post.objects.create(text='Война и мир', author=cls.tolstoy)
+        Post.objects.create(text='Каштанка', author=cls.chekhov)
+        old = Post.objects.create(text='Старое', author=cls.quiet)
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        cls.readers = [
+            User.objects.create_user(f'reader{number}',
+                                     f'reader{number}@example.com')
+            for number in range(READERS)
+        ]
+        Follow.objects.bulk_create(
+            [Follow(user=reader, author=cls.tolstoy)
+             for reader in cls.readers]
+            + [Follow(user=cls.readers[0], author=cls.chekhov)]
+            + [Follow(user=reader, author=cls.quiet)
+               for reader in cls.readers])
+        no_email = User.objects.create_user('no_email')
+        Follow.objects.create(user=no_email, author=cls.tolstoy)
+
+    def test_digest_per_reader(self):
+        """Каждый подписчик с почтой получает записи своих авторов."""
+        self.assertEqual(build_digests(batch_size=4), READERS)
+        letters = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(len(letters), READERS)
+        first = letters['reader0@example.com']
+        self.assertIn('Лев Толстой', first.body)
+        self.assertIn('Каштанка', first.body)
+        self.assertIn(f'http://yatube.test/posts/{self.war.pk}/',
+                      first.body)
+        self.assertIn('Война и мир', first.alternatives[0][0])
+        other = letters['reader1@example.com']
+        self.assertNotIn('Каштанка', other.body)
+        self.assertNotIn('Старое', other.body)
+
+    def test_queries_do_not_grow_with_readers(self):
+        """Запросов на пачку подписчиков одно и то же число."""
+        # посты за неделю; на пачку: читатели, подписки, INSERT писем
+        # и INSERT задачи отправки; пустая пачка в конце
+        with override_settings(TASKS_ALWAYS_EAGER=False), \
+                self.assertNumQueries(1 + 2 * 4 + 1):
+            build_digests(batch_size=READERS // 2)
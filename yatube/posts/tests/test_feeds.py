@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+USERNAME = 'test-username'
+INDEX_FEED = 'posts:index_feed'
+GROUP_FEED = 'posts:group_feed'
+PROFILE_FEED = 'posts:profile_feed'
+
+
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='test-group',
+            slug='test-slug',
+        )
+        cls.post = Post.objects.create(
+            text='Пост в группе',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.other_post = Post.objects.create(
+            text='Пост без группы',
+            author=cls.user,
+        )
+        cls.client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_contain_posts(self):
+        """Ленты в обоих форматах содержат посты своей выборки."""
+        urls = {
+            reverse(INDEX_FEED, args=['rss']): True,
+            reverse(INDEX_FEED, args=['atom']): True,
+            reverse(GROUP_FEED, args=[self.group.slug, 'rss']): False,
+            reverse(PROFILE_FEED, args=[USERNAME, 'atom']): True,
+        }
+        for url, has_other_post in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                body = b''.join(response.streaming_content).decode()
+                self.assertIn(self.post.text, body)
+                self.assertEqual(self.other_post.text in body,
+                                 has_other_post)
+
+    def test_unknown_feed_type(self):
+        """Неизвестный формат ленты возвращает 404."""
+        response = self.client.get(reverse(INDEX_FEED, args=['json']))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feed_not_modified(self):
+        """Повторный запрос с ETag или датой получает 304."""
+        url = reverse(INDEX_FEED, args=['rss'])
+        response = self.client.get(url)
+        b''.join(response.streaming_content)
+        for header, value in (
+            ('HTTP_IF_NONE_MATCH', response['ETag']),
+            ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified']),
+        ):
+            with self.subTest(header=header):
+                repeated = self.client.get(url, **{header: value})
+                self.assertEqual(repeated.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+    def test_feed_body_cached(self):
+        """Отрисованная лента берётся из кеша до появления нового поста."""
+        url = reverse(INDEX_FEED, args=['rss'])
+        first = b''.join(self.client.get(url).streaming_content)
+        cached = self.client.get(url)
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached.content, first)
+        Post.objects.create(text='Совсем новый пост', author=self.user)
+        fresh = self.client.get(url)
+        self.assertTrue(fresh.streaming)
+        self.assertIn('Совсем новый пост',
+                      b''.join(fresh.streaming_content).decode())
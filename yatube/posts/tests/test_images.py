@@ -0,0 +1,131 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import images
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+USERNAME = 'test-username'
+POST_EDIT = 'posts:post_edit'
+EXIF_ORIENTATION = 0x0112
+
+
+def make_jpeg(size, orientation=None):
+    image = Image.new('RGB', size, color='red')
+    options = {}
+    if orientation:
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = orientation
+        options['exif'] = exif.tobytes()
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', **options)
+    return SimpleUploadedFile(
+        name='camera.jpg',
+        content=buffer.getvalue(),
+        content_type='image/jpeg'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImagePipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+        )
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def edit_with_image(self, upload):
+        return self.authorized_client.post(
+            reverse(POST_EDIT, args=[self.post.pk]),
+            data={'text': 'Новый текст', 'image': upload},
+        )
+
+    def test_original_resized_and_stripped(self):
+        """Оригинал уменьшается, поворачивается и теряет EXIF."""
+        self.edit_with_image(make_jpeg((2400, 1000), orientation=6))
+        post = Post.objects.get(pk=self.post.pk)
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'JPEG')
+            self.assertEqual(stored.size, (800, 1920))
+            self.assertFalse(stored.getexif())
+
+    def test_processed_image_stored_like_upload(self):
+        """Перекодированный файл лежит там же, куда легла бы его загрузка."""
+        self.edit_with_image(make_jpeg((2400, 1000)))
+        post = Post.objects.get(pk=self.post.pk)
+        with open(post.image.path, 'rb') as stored:
+            content = stored.read()
+        self.assertEqual(
+            images.post_images.save('posts/copy.jpg', ContentFile(content)),
+            post.image.name)
+
+    def test_converted_image_renamed(self):
+        """Картинка, перекодированная в PNG, получает расширение .png."""
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), color='red').save(buffer, 'BMP')
+        self.edit_with_image(SimpleUploadedFile(
+            'scan.bmp', buffer.getvalue(), content_type='image/bmp'))
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertTrue(post.image.name.endswith('.png'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'PNG')
+
+    def test_small_image_kept(self):
+        """Небольшая картинка без EXIF сохраняется как есть."""
+        upload = make_jpeg((40, 20))
+        self.edit_with_image(upload)
+        post = Post.objects.get(pk=self.post.pk)
+        with open(post.image.path, 'rb') as stored:
+            self.assertEqual(stored.read(), upload.file.getvalue())
+
+    def test_huge_image_rejected(self):
+        """Слишком большая по пикселям картинка не проходит валидацию."""
+        with mock.patch.object(images, 'MAX_SOURCE_PIXELS', 100):
+            response = self.edit_with_image(make_jpeg((20, 20)))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Post.objects.get(pk=self.post.pk).image)
+
+    def test_image_meta_stored(self):
+        """Размеры, цвет и превью считаются при обработке картинки."""
+        self.edit_with_image(make_jpeg((2400, 1000), orientation=6))
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual((post.image_width, post.image_height), (800, 1920))
+        self.assertEqual(post.image_color[:3], '#fe')
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,'))
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertContains(response, 'width="800"')
+        self.assertContains(response, 'height="1920"')
+        self.assertContains(response, post.image_placeholder)
+
+    def test_backfill_command(self):
+        """backfill_image_meta заполняет сведения у старых постов."""
+        self.edit_with_image(make_jpeg((40, 20)))
+        Post.objects.filter(pk=self.post.pk).update(
+            image_width=None, image_height=None, image_color='',
+            image_placeholder='')
+        call_command('backfill_image_meta', stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual((post.image_width, post.image_height), (40, 20))
+        self.assertTrue(post.image_placeholder)
@@ -0,0 +1,126 @@
+from http import HTTPStatus
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+from PIL import Image
+
+from core.events import ASYNC_EVENTS, SSE_RETRY_MS, LocalBroker, get_broker
+from core.tasks import run_pending
+from posts.models import Post, User
+
+USERNAME = 'test-username'
+
+
+def make_upload(size):
+    buffer = BytesIO()
+    Image.new('RGB', size, color='red').save(buffer, 'JPEG')
+    return SimpleUploadedFile('big.jpg', buffer.getvalue(),
+                              content_type='image/jpeg')
+
+
+class LocalBrokerTests(TestCase):
+    def test_publish_reaches_subscribers_of_channel(self):
+        """Событие получают только подписчики его канала."""
+        broker = LocalBroker()
+        listener = broker.subscribe(['post:1'])
+        stranger = broker.subscribe(['post:2'])
+        broker.publish('post:1', 'comment', '<p>x</p>')
+        self.assertEqual(listener.get(timeout=0), ('comment', '<p>x</p>'))
+        self.assertIsNone(stranger.get(timeout=0))
+        listener.close()
+        broker.publish('post:1', 'comment', '<p>y</p>')
+        self.assertIsNone(listener.get(timeout=0))
+
+
+class LiveViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def test_stream_sends_published_event(self):
+        """Поток отдаёт retry и затем опубликованное событие."""
+        response = Client().get(reverse('posts:index_events'),
+                                **{ASYNC_EVENTS: True})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        stream = iter(response.streaming_content)
+        self.assertEqual(next(stream), f'retry: {SSE_RETRY_MS}\n\n'.encode())
+        get_broker().publish('posts', 'post', '<p>один</p>\n<p>два</p>')
+        self.assertEqual(
+            next(stream).decode(),
+            'event: post\ndata: <p>один</p>\ndata: <p>два</p>\n\n',
+        )
+        response.close()
+
+    def test_no_held_stream_under_wsgi(self):
+        """Под WSGI страница не открывает EventSource, поток отвечает 204."""
+        client = Client()
+        self.assertNotContains(client.get(reverse('posts:index')),
+                               'EventSource')
+        response = client.get(reverse('posts:index_events'))
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        response = client.get(reverse('posts:post_detail',
+                                      args=[self.post.pk]),
+                              **{ASYNC_EVENTS: True})
+        self.assertContains(response, 'EventSource')
+
+    def test_follow_events_requires_login(self):
+        """Поток подписок доступен только авторизованному пользователю."""
+        response = Client().get(reverse('posts:follow_events'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_post_events_unknown_post(self):
+        """Поток комментариев несуществующего поста отвечает 404."""
+        response = Client().get(reverse('posts:post_events', args=[0]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class LiveAnnounceTests(TransactionTestCase):
+    def test_comment_announced_after_commit(self):
+        """Новый комментарий уходит подписчикам поста после коммита."""
+        user = User.objects.create_user(username=USERNAME)
+        post = Post.objects.create(text='Тестовый пост', author=user)
+        client = Client()
+        client.force_login(user)
+        subscription = get_broker().subscribe([f'post:{post.pk}'])
+        try:
+            client.post(
+                reverse('posts:add_comment', args=[post.pk]),
+                data={'text': 'Живой комментарий'},
+            )
+            event, data = subscription.get(timeout=1)
+        finally:
+            subscription.close()
+        self.assertEqual(event, 'comment')
+        self.assertIn('Живой комментарий', data)
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_post_announced_after_image_processing(self):
+        """Карточка нового поста рендерится задачей, а не в запросе."""
+        user = User.objects.create_user(username=USERNAME)
+        client = Client()
+        client.force_login(user)
+        subscription = get_broker().subscribe(['posts'])
+        try:
+            client.post(reverse('posts:post_create'), data={
+                'text': 'Пост с картинкой',
+                'image': make_upload((2400, 1200)),
+            })
+            self.assertIsNone(subscription.get(timeout=0))
+            uploaded = Post.objects.get().image.name
+            self.assertEqual(run_pending(), 1)
+            event, data = subscription.get(timeout=1)
+        finally:
+            subscription.close()
+        post = Post.objects.get()
+        self.assertNotEqual(post.image.name, uploaded)
+        self.assertEqual(post.image_width, 1920)
+        self.assertEqual(event, 'post')
+        self.assertIn('Пост с картинкой', data)
@@ -0,0 +1,179 @@
+import re
+from http import HTTPStatus
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.tasks import run_pending
+from posts import moderation, reactions
+from posts.models import (
+    ArchivedPost, Comment, Follow, Group, Notification, Post, PostViews,
+    Reaction, User,
+)
+from posts.viewcount import flush_views
+
+POST_CHANGELIST = 'admin:posts_post_changelist'
+COMMENT_CHANGELIST = 'admin:posts_comment_changelist'
+USER_CHANGELIST = 'admin:auth_user_changelist'
+SPAM = 'Купите слона'
+
+
+class ModerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='x')
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Обычный пост', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def run_action(self, changelist, action, objects, **data):
+        return self.client.post(reverse(changelist), {
+            'action': action,
+            ACTION_CHECKBOX_NAME: [obj.pk for obj in objects],
+            **data,
+        }, follow=True)
+
+    def test_delete_all_by_authors(self):
+        """Удаляются все посты автора с комментариями, не только выбранные."""
+        Post.objects.bulk_create([
+            Post(text=SPAM, author=self.spammer)
+            for _ in range(moderation.BATCH_SIZE + 5)
+        ])
+        spam = list(Post.objects.filter(author=self.spammer))
+        Comment.objects.create(post=spam[0], author=self.author, text='!')
+        response = self.run_action(POST_CHANGELIST, 'delete_all_by_authors',
+                                   spam[:1])
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+        message = list(response.context['messages'])[0].message
+        self.assertIn('Ход выполнения', message)
+
+    def test_delete_without_loading_rows(self):
+        """Посты и комментарии удаляются по pk, строки не загружаются."""
+        Post.objects.bulk_create([
+            Post(text=SPAM, author=self.spammer) for _ in range(20)])
+        spam = Post.objects.filter(author=self.spammer).first()
+        Comment.objects.create(post=spam, author=self.author, text='!')
+        Comment.objects.create(post=self.post, author=self.author, text=SPAM)
+        reactions.react(self.author, spam.pk, 'like')
+        flush_views({spam.pk: 2})
+        with CaptureQueriesContext(connection) as queries:
+            moderation.start('Удаление', moderation.delete_posts_by_authors,
+                             [self.spammer.pk])
+            moderation.start('Чистка', moderation.purge_comments, [SPAM])
+        loaded = [
+            query['sql'] for query in queries.captured_queries
+            if re.match(r'SELECT [^(]*"text".* FROM', query['sql'])]
+        self.assertEqual(loaded, [])
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Reaction.objects.filter(post_id=spam.pk).exists())
+        self.assertFalse(PostViews.objects.filter(post_id=spam.pk).exists())
+
+    def test_move_to_group(self):
+        """Выбранные посты переносятся в группу из формы действия."""
+        self.run_action(POST_CHANGELIST, 'move_to_group', [self.post],
+                        group=self.group.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.group, self.group)
+
+    def test_purge_matching_comments(self):
+        """Удаляются все комментарии с тем же текстом."""
+        for _ in range(3):
+            Comment.objects.create(post=self.post, author=self.spammer,
+                                   text=SPAM)
+        kept = Comment.objects.create(post=self.post, author=self.author,
+                                      text='Спасибо')
+        self.run_action(COMMENT_CHANGELIST, 'purge_matching',
+                        [Comment.objects.filter(text=SPAM).first()])
+        self.assertEqual(list(Comment.objects.all()), [kept])
+
+    def test_progress_page(self):
+        """Страница прогресса показывает число обработанных записей."""
+        job_id = moderation.start(
+            'Перенос', moderation.move_posts_to_group, [self.post.pk],
+            self.group.pk)
+        self.assertEqual(moderation.get_progress(job_id)['state'], 'done')
+        response = self.client.get(reverse(
+            'admin:posts_post_moderation', args=[job_id]))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, '1 из 1')
+        response = self.client.get(reverse(
+            'admin:posts_post_moderation', args=['missing']))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_progress_from_worker(self):
+        """Прогресс задачи, выполненной воркером, виден на странице."""
+        job_id = moderation.start(
+            'Перенос', moderation.move_posts_to_group, [self.post.pk],
+            self.group.pk)
+        url = reverse('admin:posts_post_moderation', args=[job_id])
+        self.assertContains(self.client.get(url), 'Задача ждёт очереди')
+        self.assertEqual(run_pending(), 1)
+        self.assertContains(self.client.get(url), 'Готово')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.group, self.group)
+
+    def test_delete_users_in_background(self):
+        """Пользователь удаляется пачками вместе со всем, что он оставил."""
+        Post.objects.bulk_create([
+            Post(text=SPAM, author=self.spammer)
+            for _ in range(moderation.BATCH_SIZE + 5)
+        ])
+        spam = Post.objects.filter(author=self.spammer).first()
+        Comment.objects.create(post=spam, author=self.author, text='!')
+        Comment.objects.create(post=self.post, author=self.spammer,
+                               text=SPAM)
+        ArchivedPost.objects.create(id=10 ** 6, text=SPAM,
+                                    pub_date=timezone.now(),
+                                    author=self.spammer)
+        Follow.objects.create(user=self.spammer, author=self.author)
+        Follow.objects.create(user=self.author, author=self.spammer)
+        reactions.react(self.spammer, self.post.pk, 'like')
+        reactions.react(self.author, self.post.pk, 'like')
+        Notification.objects.create(
+            recipient=self.spammer, kind=Notification.FOLLOW,
+            topic='follow', actor=self.author)
+        kept = Notification.objects.create(
+            recipient=self.author, kind=Notification.COMMENT,
+            topic=f'comment:{self.post.pk}', post=self.post,
+            actor=self.spammer)
+
+        response = self.run_action(USER_CHANGELIST, 'delete_in_background',
+                                   [self.spammer, self.admin])
+
+        self.assertFalse(User.objects.filter(pk=self.spammer.pk).exists())
+        self.assertTrue(User.objects.filter(pk=self.admin.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(reactions.reaction_counts([self.post.pk]),
+                         {self.post.pk: [('👍', 1)]})
+        self.assertEqual(list(Notification.objects.all()), [kept])
+        kept.refresh_from_db()
+        self.assertIsNone(kept.actor)
+        message = list(response.context['messages'])[0].message
+        self.assertIn('Ход выполнения', message)
+
+    def test_user_delete_only_in_background(self):
+        """Обычное удаление пользователя с каскадом в запросе закрыто."""
+        response = self.client.get(reverse(USER_CHANGELIST))
+        self.assertContains(response, 'delete_in_background')
+        self.assertNotContains(response, 'delete_selected')
+        response = self.client.get(reverse(
+            'admin:auth_user_delete', args=[self.spammer.pk]))
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import notifications
+from posts.models import Comment, Notification, Post, User
+
+BURST = 37
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test-username')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_cached_index_badge_per_user(self):
+        """Закэшированная главная не показывает чужой счётчик уведомлений."""
+        Notification.objects.bulk_create([
+            Notification(recipient=self.reader, kind=Notification.FOLLOW,
+                         topic=f'follow:{number}')
+            for number in range(7)
+        ])
+        badge = '<span class="badge bg-danger">7</span>'
+        url = reverse('posts:index')
+        self.assertContains(self.client.get(url), badge)
+        other = Client()
+        other.force_login(self.other)
+        response = other.get(url)
+        self.assertNotContains(response, badge)
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_comment_burst_coalesced(self):
+        """Поток комментариев даёт автору одно уведомление со счётчиком."""
+        url = reverse('posts:add_comment', args=[self.post.pk])
+        for _ in range(3):
+            self.client.post(url, data={'text': 'Комментарий'})
+        comments = Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.reader, text='Ещё')
+            for _ in range(BURST - 3)
+        ])
+        for comment in Comment.objects.filter(text='Ещё'):
+            notifications.notify_comment(comment.pk)
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.count, len(comments) + 3)
+        self.assertEqual(notification.actor, self.reader)
+        self.assertFalse(
+            Notification.objects.filter(recipient=self.reader).exists())
+
+    def test_commenters_notified(self):
+        """Прежние комментаторы тоже узнают о новом комментарии."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Первый')
+        notifications.notify_comment(comment.pk)
+        reply = Comment.objects.create(
+            post=self.post, author=self.other, text='Ответ')
+        notifications.notify_comment(reply.pk)
+        self.assertEqual(
+            set(Notification.objects.values_list('recipient__username',
+                                                 'count')),
+            {('test-username', 2), ('reader', 1)})
+
+    def test_follow_and_unread_count(self):
+        """Подписка видна в шапке автора, после прочтения счётчик пуст."""
+        self.client.get(reverse('posts:profile_follow',
+                                args=[self.author.username]))
+        author = Client()
+        author.force_login(self.author)
+        self.assertEqual(notifications.unread_count(self.author.pk), 1)
+        response = author.get(reverse('posts:notifications'))
+        self.assertContains(response, 'Новый подписчик')
+        self.assertContains(response, '<span class="badge bg-danger">1')
+        author.post(reverse('posts:notifications_read'))
+        self.assertEqual(notifications.unread_count(self.author.pk), 0)
+        # Прочитанное не копит новые события: следующее — новая строка.
+        notifications.notify_follow(self.other.pk, self.author.pk)
+        self.assertEqual(Notification.objects.filter(
+            recipient=self.author).count(), 2)
+        self.assertEqual(notifications.unread_count(self.author.pk), 1)
+
+    def test_fan_out_in_batches(self):
+        """Рассылка большому числу получателей идёт пачками."""
+        User.objects.bulk_create([
+            User(username=f'user{number}') for number in range(5)])
+        ids = list(User.objects.filter(
+            username__startswith='user').values_list('pk', flat=True))
+        # по три запроса и две точки сохранения на каждую из трёх пачек
+        with mock.patch.object(notifications, 'FANOUT_BATCH', 2), \
+                self.assertNumQueries(3 * 5):
+            notifications.fan_out(ids, Notification.FOLLOW, 'follow',
+                                  self.author.pk)
+        self.assertEqual(Notification.objects.count(), len(ids))
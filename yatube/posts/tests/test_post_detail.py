@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+from posts.notifications import unread_count
+
+USERNAME = 'test-username'
+# пользователь из сессии, пост с автором и счётчиком, комментарии
+DETAIL_QUERIES = 3
+
+
+class PostDetailQueryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Пост', author=cls.user,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def test_queries_do_not_grow_with_comments(self):
+        """Число запросов не зависит от числа комментариев."""
+        for count in (1, 10):
+            Comment.objects.bulk_create([
+                Comment(post=self.post, author=self.user, text='Коммент')
+                for _ in range(count)
+            ])
+            cache.clear()
+            # счётчик уведомлений в шапке обычно уже в кэше
+            unread_count(self.user.pk)
+            with self.subTest(comments=count):
+                with self.assertNumQueries(DETAIL_QUERIES):
+                    self.client.get(self.url)
+        with self.assertNumQueries(DETAIL_QUERIES - 1):
+            self.client.get(self.url)
+
+    def test_cached_comments_invalidated(self):
+        """Новый и удалённый комментарий сразу видны на странице."""
+        self.client.get(self.url)
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            data={'text': 'Свежий комментарий'},
+        )
+        self.assertContains(self.client.get(self.url), 'Свежий комментарий')
+        Comment.objects.get(text='Свежий комментарий').delete()
+        self.assertNotContains(self.client.get(self.url),
+                               'Свежий комментарий')
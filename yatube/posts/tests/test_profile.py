@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post, User
+from posts.notifications import unread_count
+
+USERNAME = 'test-username'
+FOLLOWER = 'follower'
+POSTS_COUNT = 15
+# пользователь из сессии, автор со счётчиками, страница постов, реакции
+PROFILE_QUERIES = 4
+
+
+class ProfileQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.follower = User.objects.create_user(username=FOLLOWER)
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        Post.objects.bulk_create([
+            Post(text=f'Пост {number}', author=cls.author)
+            for number in range(POSTS_COUNT)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        # счётчик уведомлений в шапке обычно уже в кэше
+        unread_count(self.follower.pk)
+        self.client = Client()
+        self.client.force_login(self.follower)
+        self.url = reverse('posts:profile', args=[USERNAME])
+
+    def test_query_budget(self):
+        """Профиль укладывается в бюджет запросов с шапкой и без неё."""
+        for page in (1, 2, 1):
+            with self.subTest(page=page):
+                with self.assertNumQueries(PROFILE_QUERIES):
+                    self.client.get(self.url, {'page': page})
+
+    def test_header_counts_and_follow_state(self):
+        """Шапка показывает счётчики, кнопка — состояние подписки."""
+        response = self.client.get(self.url)
+        self.assertContains(response, f'Всего постов: {POSTS_COUNT}')
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertContains(response, reverse(
+            'posts:profile_unfollow', args=[USERNAME]))
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         POSTS_COUNT)
+
+    def test_header_refreshed_after_unfollow(self):
+        """После отписки шапка не показывает старые счётчики."""
+        self.client.get(self.url)
+        self.client.get(reverse('posts:profile_unfollow', args=[USERNAME]))
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Подписчиков: 0')
+        self.assertContains(response, reverse(
+            'posts:profile_follow', args=[USERNAME]))
+
+    def test_header_refreshed_after_post_delete(self):
+        """Удалённый пост сразу пропадает из счётчика в шапке."""
+        self.client.get(self.url)
+        Post.objects.filter(author=self.author).first().delete()
+        response = self.client.get(self.url)
+        self.assertContains(response, f'Всего постов: {POSTS_COUNT - 1}')
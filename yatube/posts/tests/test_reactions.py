@@ -0,0 +1,87 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.models import Post, Reaction, ReactionCounter, User
+from posts.reactions import COUNTER_SHARDS, react, reaction_counts
+
+READERS = 20
+
+
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test-username')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        cls.readers = [User.objects.create_user(username=f'reader{number}')
+                       for number in range(READERS)]
+
+    def setUp(self):
+        cache.clear()
+
+    def total(self, kind):
+        return ReactionCounter.objects.filter(
+            post=self.post, kind=kind).aggregate(Sum('count'))['count__sum']
+
+    def test_react_toggles_and_switches(self):
+        """Повтор снимает реакцию, другая реакция заменяет прежнюю."""
+        reader = self.readers[0]
+        self.assertEqual(react(reader, self.post.pk, 'like'), 'like')
+        self.assertEqual(react(reader, self.post.pk, 'love'), 'love')
+        self.assertEqual((self.total('like'), self.total('love')), (0, 1))
+        self.assertIsNone(react(reader, self.post.pk, 'love'))
+        self.assertEqual(self.total('love'), 0)
+        self.assertFalse(Reaction.objects.exists())
+
+    def test_counts_spread_over_shards(self):
+        """Счётчик раскладывается по частям, а сумма сходится."""
+        for reader in self.readers:
+            react(reader, self.post.pk, 'like')
+        react(self.readers[0], self.post.pk, 'laugh')
+        shards = ReactionCounter.objects.filter(post=self.post, kind='like')
+        self.assertGreater(shards.count(), 1)
+        self.assertLessEqual(shards.count(), COUNTER_SHARDS)
+        self.assertEqual(reaction_counts([self.post.pk]),
+                         {self.post.pk: [('👍', READERS - 1), ('😂', 1)]})
+
+    def test_feed_shows_counts(self):
+        """Карточка поста в ленте показывает число реакций."""
+        for reader in self.readers[:3]:
+            react(reader, self.post.pk, 'love')
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, '❤️ 3')
+
+    def test_archived_post_keeps_counts(self):
+        """Архивный пост показывает реакции, накопленные до переноса."""
+        for reader in self.readers[:2]:
+            react(reader, self.post.pk, 'laugh')
+        archive_posts(timezone.now())
+        client = Client()
+        client.force_login(self.readers[0])
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        response = client.get(detail)
+        self.assertTrue(response.context['is_archived'])
+        self.assertContains(response, '😂 2')
+        self.assertNotContains(
+            response, reverse('posts:post_react', args=[self.post.pk]))
+
+    def test_react_view(self):
+        """Реакция ставится POST-запросом и отмечается на странице поста."""
+        client = Client()
+        client.force_login(self.readers[0])
+        url = reverse('posts:post_react', args=[self.post.pk])
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        self.assertRedirects(client.post(url, {'kind': 'like'}), detail)
+        response = client.get(detail)
+        self.assertEqual(response.context['post'].my_reaction, 'like')
+        self.assertEqual(response.context['reactions'][0], ('like', '👍', 1))
+        self.assertEqual(client.post(url, {'kind': 'dislike'}).status_code,
+                         HTTPStatus.BAD_REQUEST)
+        self.assertEqual(client.get(url).status_code,
+                         HTTPStatus.METHOD_NOT_ALLOWED)
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import rendering
+from posts.models import Post, User
+
+USERNAME = 'test-username'
+
+
+def shout(text):
+    return text.upper()
+
+
+class RenderingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+
+    def test_default_renderer(self):
+        """Текст экранируется, ссылки и упоминания становятся ссылками."""
+        html = rendering.default_renderer(
+            f'<b>Привет</b>, @{USERNAME} и @nobody!\n'
+            'См. https://example.com и mail@example.com')
+        self.assertIn('&lt;b&gt;Привет&lt;/b&gt;', html)
+        self.assertIn(
+            f'<a href="{reverse("posts:profile", args=[USERNAME])}">'
+            f'@{USERNAME}</a>', html)
+        self.assertIn('@nobody!<br>', html)
+        self.assertIn('<a href="https://example.com" rel="nofollow">', html)
+        self.assertIn('<a href="mailto:mail@example.com">', html)
+
+    def test_mention_before_punctuation(self):
+        """Точка после упоминания остаётся текстом, ссылка ведёт на автора."""
+        html = rendering.default_renderer(
+            f'Спасибо @{USERNAME}. И @{USERNAME}-! И @nobody.')
+        link = (f'<a href="{reverse("posts:profile", args=[USERNAME])}">'
+                f'@{USERNAME}</a>')
+        self.assertIn(f'Спасибо {link}. И {link}-!', html)
+        self.assertIn('@nobody.', html)
+
+    def test_rendered_on_save(self):
+        """HTML и отрывок готовятся при сохранении поста."""
+        text = ' '.join(['слово'] * (rendering.EXCERPT_WORDS + 10))
+        post = Post.objects.create(text=text, author=self.user)
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, text)
+        self.assertEqual(len(post.excerpt_html.split()),
+                         rendering.EXCERPT_WORDS)
+        self.assertTrue(post.excerpt_html.endswith('…'))
+
+    def test_bulk_created_rendered_on_access(self):
+        """Пост из bulk_create рендерится при обращении к html."""
+        Post.objects.bulk_create([Post(text='a\nb', author=self.user)])
+        post = Post.objects.get()
+        self.assertEqual(post.text_html, '')
+        self.assertEqual(post.html, 'a<br>b')
+
+    @override_settings(POSTS_TEXT_RENDERER='posts.tests.test_rendering.shout')
+    def test_pluggable_renderer(self):
+        """Рендерер подменяется настройкой POSTS_TEXT_RENDERER."""
+        with mock.patch.object(rendering, '_renderer', None):
+            post = Post.objects.create(text='тихо', author=self.user)
+        self.assertEqual(post.text_html, 'ТИХО')
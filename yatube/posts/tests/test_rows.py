@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+from posts.rows import FeedRows, PostRow
+
+POSTS_COUNT = 12
+
+
+class FeedRowsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='test-username', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create([
+            Post(text=f'Пост номер {number}', author=cls.user,
+                 group=cls.group)
+            for number in range(POSTS_COUNT)
+        ])
+        cls.post = Post.objects.create(
+            text='Первый\nпост', author=cls.user, image='posts/a.png')
+
+    def test_rows_match_models(self):
+        """Строки ленты повторяют поля постов и сравниваются с моделями."""
+        rows = FeedRows(Post.objects.all())[:POSTS_COUNT + 1]
+        posts = list(Post.objects.all())
+        self.assertEqual([row.pk for row in rows],
+                         [post.pk for post in posts])
+        first = rows[0]
+        self.assertIsInstance(first, PostRow)
+        self.assertEqual(first, self.post)
+        self.assertEqual(first.author, self.user)
+        self.assertEqual(first.author.get_full_name(), 'Лев Толстой')
+        self.assertEqual(first.image, self.post.image)
+        self.assertEqual(first.image.url, self.post.image.url)
+        self.assertEqual(first.excerpt, self.post.excerpt)
+        self.assertIsNone(first.group)
+        self.assertEqual(rows[1].group, self.group)
+        # Автор и группа на странице создаются один раз.
+        self.assertIs(rows[1].author, rows[0].author)
+        self.assertIs(rows[1].group, rows[2].group)
+
+    def test_rows_skip_heavy_columns(self):
+        """Лента не читает хэш пароля и текст уже отрендеренных постов."""
+        with CaptureQueriesContext(connection) as queries:
+            rows = FeedRows(Post.objects.filter(pk=self.post.pk))[:1]
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('password', queries[0]['sql'])
+        with self.assertNumQueries(1):
+            self.assertEqual(rows[0].text, self.post.text)
+
+    def test_unrendered_rows_rendered_in_one_query(self):
+        """Посты из bulk_create получают отрывок без лишних запросов."""
+        with self.assertNumQueries(1):
+            row = FeedRows(Post.objects.filter(image=''))[0]
+            self.assertIn('Пост номер', row.excerpt)
+            self.assertEqual(row.text, row.excerpt)
+
+    def test_follow_feed_links_group(self):
+        """Лента подписок ведёт на страницу группы поста."""
+        cache.clear()
+        author = User.objects.create_user(
+            username='author', first_name='Антон', last_name='Чехов')
+        Post.objects.create(text='Пост', author=author, group=self.group)
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        client = Client()
+        client.force_login(reader)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertContains(response, reverse('posts:posts',
+                                              args=[self.group.slug]))
+        self.assertContains(response, 'Антон Чехов')
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+OTHER_GIF = SMALL_GIF[:-3] + b'\x0B\x00\x3B'
+
+
+def upload(content=SMALL_GIF, name='small.gif'):
+    return SimpleUploadedFile(
+        name=name, content=content, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test-username')
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, **kwargs):
+        kwargs.setdefault('image', upload())
+        return Post.objects.create(text='Текст', author=self.user, **kwargs)
+
+    def test_same_content_stored_once(self):
+        """Одинаковые картинки разных постов лежат в одном файле."""
+        first = self.create_post()
+        second = self.create_post(image=upload(name='copy.gif'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}'
+                                           r'\.gif$')
+        self.assertTrue(os.path.exists(first.image.path))
+
+    def test_file_kept_while_referenced(self):
+        """Файл удаляется только вместе с последним постом."""
+        first = self.create_post()
+        second = self.create_post()
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_replaced_image_collected(self):
+        """Старая картинка удаляется после замены в посте."""
+        post = self.create_post()
+        old_path = post.image.path
+        post.image = upload(OTHER_GIF)
+        post.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(post.image.path))
+
+    def test_upload_survives_concurrent_release(self):
+        """Файл, удалённый до коммита поста с той же картинкой, вернётся."""
+        first = self.create_post()
+        path = first.image.path
+        with transaction.atomic():
+            second = self.create_post(image=upload(name='copy.gif'))
+            # Параллельный release_image, не видящий второго поста до
+            # коммита, успел удалить файл.
+            os.remove(path)
+        self.assertEqual(second.image.path, path)
+        self.assertTrue(os.path.exists(path))
+        with open(path, 'rb') as stored:
+            self.assertEqual(stored.read(), SMALL_GIF)
@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import trending
+from posts.models import Post, TrendingBucket, User
+
+NOW = 1000 * trending.HOUR
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test-username')
+        cls.old = Post.objects.create(text='Вчерашний спор', author=cls.user)
+        cls.new = Post.objects.create(text='Свежий пост', author=cls.user)
+        cls.quiet = Post.objects.create(text='Тишина', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post, hours_ago, times=1):
+        for _ in range(times):
+            trending.record_comment(post.pk, NOW - hours_ago * trending.HOUR)
+
+    def test_comments_counted_per_hour(self):
+        """Комментарии одного часа попадают в один счётчик."""
+        self.comment(self.new, 0, times=3)
+        self.comment(self.new, 1)
+        self.assertEqual(
+            list(TrendingBucket.objects.filter(post=self.new).order_by(
+                'hour').values_list('comments', flat=True)),
+            [1, 3])
+
+    def test_add_comment_records_activity(self):
+        """Комментарий через сайт увеличивает счётчик поста."""
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('posts:add_comment', args=[self.old.pk]),
+                    data={'text': 'Комментарий'})
+        self.assertEqual(
+            TrendingBucket.objects.get(post=self.old).comments, 1)
+
+    def test_rank_decays_with_age(self):
+        """Старые комментарии весят меньше, в длинном окне — медленнее."""
+        self.comment(self.old, 20, times=3)
+        self.comment(self.new, 0)
+        self.assertEqual(trending.rank('day', NOW),
+                         [self.new.pk, self.old.pk])
+        self.assertEqual(trending.rank('week', NOW),
+                         [self.old.pk, self.new.pk])
+
+    def test_compact_caches_top_and_prunes(self):
+        """Сжатие кладёт списки в кэш и удаляет вышедшие из окон часы."""
+        self.comment(self.old, 24 * 8)
+        self.comment(self.new, 2)
+        self.assertEqual(trending.compact(NOW), 1)
+        self.assertEqual(cache.get(trending.top_key('day')), [self.new.pk])
+        self.assertEqual(cache.get(trending.top_key('week')), [self.new.pk])
+
+    def test_page_reads_only_listed_posts(self):
+        """Лента читает только посты страницы по готовому списку."""
+        cache.set(trending.top_key('week'), [self.new.pk, self.old.pk])
+        client = Client()
+        # строки постов и суммы их реакций
+        with self.assertNumQueries(2):
+            response = client.get(reverse('posts:trending', args=['week']))
+        self.assertEqual([post.pk for post in response.context['page_obj']],
+                         [self.new.pk, self.old.pk])
+
+    def test_unknown_window(self):
+        """Неизвестное окно — 404."""
+        response = Client().get(reverse('posts:trending', args=['year']))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
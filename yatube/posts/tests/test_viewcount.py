@@ -0,0 +1,103 @@
+from datetime import date
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import viewcount
+from posts.models import Post, PostViews, User
+
+BOT = 'Mozilla/5.0 (compatible; Googlebot/2.1)'
+
+
+class ViewCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test-username')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        cls.other = Post.objects.create(text='Другой', author=cls.user)
+
+    def setUp(self):
+        viewcount.reset()
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def tearDown(self):
+        viewcount.reset()
+
+    def test_views_buffered_and_deduplicated(self):
+        """Просмотры копятся в памяти, повторы и роботы не считаются."""
+        for address in ('10.0.0.1', '10.0.0.2', '10.0.0.1'):
+            Client(REMOTE_ADDR=address).get(self.url)
+        Client(HTTP_USER_AGENT=BOT).get(self.url)
+        self.assertEqual(viewcount.pending(self.post.pk), 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+        response = Client(REMOTE_ADDR='10.0.0.3').get(self.url)
+        self.assertEqual(response.context['views'], 3)
+
+    def test_flush_batches_updates(self):
+        """Сброс пишет посты с одинаковым приростом одним UPDATE."""
+        third = Post.objects.create(text='Третий', author=self.user)
+        counts = {self.post.pk: 2, self.other.pk: 2, third.pk: 5,
+                  third.pk + 100: 1}
+        # точка сохранения и её снятие, проверка постов, строки истории,
+        # два прироста по UPDATE поста и истории
+        with self.assertNumQueries(2 + 1 + 1 + 2 * 2):
+            viewcount.flush_views(counts)
+        viewcount.flush_views({self.post.pk: 1})
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('views', flat=True)),
+            [3, 2, 5])
+        self.assertEqual(PostViews.objects.get(post=self.post).views, 3)
+
+    def test_flush_when_buffer_full(self):
+        """Полный буфер уходит в базу после коммита."""
+        with mock.patch.object(viewcount, 'FLUSH_SIZE', 2), \
+                mock.patch.object(viewcount.transaction, 'on_commit',
+                                  lambda func: func()):
+            Client().get(self.url)
+            Client().get(
+                reverse('posts:post_detail', args=[self.other.pk]))
+        self.assertEqual(viewcount.pending(self.post.pk), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+    @mock.patch('posts.viewcount.atexit.register')
+    @mock.patch('posts.viewcount.threading.Thread')
+    def test_flusher_started_once(self, thread, register):
+        """Фоновый сброс и сброс при выходе включаются один раз."""
+        with mock.patch.object(viewcount, '_flusher', None):
+            viewcount.start_flusher()
+            viewcount.start_flusher()
+        thread.return_value.start.assert_called_once_with()
+        register.assert_called_once_with(viewcount.flush)
+
+    def test_quiet_process_flushed(self):
+        """Сброс без новых просмотров отправляет накопленное в базу."""
+        self.client.get(self.url)
+        with mock.patch.object(viewcount.time, 'sleep',
+                               side_effect=[None, SystemExit]), \
+                self.assertRaises(SystemExit):
+            viewcount._flush_periodically()
+        self.assertEqual(viewcount.pending(self.post.pk), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+    def test_compact_history(self):
+        """Старые дни сворачиваются в месяцы, свежие остаются."""
+        for day, views in ((date(2026, 7, 3), 2), (date(2026, 7, 20), 3),
+                           (date(2026, 8, 31), 4), (date(2026, 9, 25), 1)):
+            viewcount.flush_views({self.post.pk: views}, day=day)
+        today = date(2026, 10, 19)
+        self.assertEqual(viewcount.compact_history(today, keep_days=31),
+                         (3, 2))
+        self.assertEqual(viewcount.compact_history(today, keep_days=31),
+                         (2, 2))
+        self.assertEqual(
+            list(PostViews.objects.order_by('day').values_list(
+                'day', 'views')),
+            [(date(2026, 7, 1), 5), (date(2026, 8, 1), 4),
+             (date(2026, 9, 25), 1)])
+        call_command('compact_views', stdout=mock.Mock())
@@ -0,0 +1,119 @@
+"""Популярные посты по скорости комментирования.
+
+add_comment увеличивает счётчик TrendingBucket поста за текущий час,
+поэтому таблица комментариев при показе ленты не читается. Команда
+compact_trending, запускаемая периодически (например, раз в пять минут
+из cron), для каждого окна из WINDOWS складывает счётчики его часов с
+затуханием по возрасту, кладёт в кэш TOP_SIZE id постов и удаляет
+часы, вышедшие из всех окон. Лента берёт из готового списка срез
+страницы и читает только эти посты.
+"""
+import heapq
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Post, TrendingBucket
+from .rows import post_rows
+
+HOUR = 60 * 60
+# окно: (сколько последних часов учитывать, за сколько часов вес
+# комментария падает вдвое)
+WINDOWS = {
+    'day': (24, 6),
+    'week': (7 * 24, 48),
+}
+WINDOW_TITLES = {
+    'day': 'За сутки',
+    'week': 'За неделю',
+}
+DEFAULT_WINDOW = 'day'
+TOP_SIZE = 100
+# Список живёт дольше интервала запуска compact_trending; если он всё
+# же пропал из кэша, лента пересчитывает его сама.
+TOP_TIMEOUT = 30 * 60
+
+
+def current_hour(now=None):
+    return int((time.time() if now is None else now) // HOUR)
+
+
+def top_key(window):
+    return f'posts:trending:{window}'
+
+
+def record_comment(post_id, now=None):
+    """Учитывает новый комментарий к посту в счётчике текущего часа."""
+    hour = current_hour(now)
+    buckets = TrendingBucket.objects.filter(post_id=post_id, hour=hour)
+    if buckets.update(comments=F('comments') + 1):
+        return
+    try:
+        with transaction.atomic():
+            TrendingBucket.objects.create(
+                post_id=post_id, hour=hour, comments=1)
+    except IntegrityError:
+        # Параллельный запрос успел создать счётчик этого часа.
+        buckets.update(comments=F('comments') + 1)
+
+
+def rank(window, now=None, size=TOP_SIZE):
+    """id самых обсуждаемых за окно постов, по убыванию счёта."""
+    hours, half_life = WINDOWS[window]
+    hour = current_hour(now)
+    scores = defaultdict(float)
+    buckets = TrendingBucket.objects.filter(
+        hour__gt=hour - hours).values_list('post_id', 'hour', 'comments')
+    for post_id, bucket_hour, comments in buckets.iterator():
+        scores[post_id] += comments * 0.5 ** ((hour - bucket_hour)
+                                              / half_life)
+    # При равном счёте выше более новый пост.
+    return heapq.nlargest(size, scores, key=lambda pk: (scores[pk], pk))
+
+
+def compact(now=None):
+    """Пересчитывает списки всех окон и удаляет устаревшие счётчики.
+
+    Возвращает число удалённых счётчиков.
+    """
+    cache.set_many({
+        top_key(window): rank(window, now) for window in WINDOWS
+    }, TOP_TIMEOUT)
+    oldest = current_hour(now) - max(hours for hours, _ in WINDOWS.values())
+    deleted, _ = TrendingBucket.objects.filter(hour__lte=oldest).delete()
+    return deleted
+
+
+def get_top(window):
+    top = cache.get(top_key(window))
+    if top is None:
+        top = rank(window)
+        cache.set(top_key(window), top, TOP_TIMEOUT)
+    return top
+
+
+class TrendingRows:
+    """Готовый список id для Paginator: срез читает только свою страницу.
+
+    Посты, удалённые после пересчёта, из страницы просто выпадают.
+    """
+
+    def __init__(self, pks):
+        self.pks = pks
+
+    def count(self):
+        return len(self.pks)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        pks = self.pks[index]
+        rows = {row.pk: row
+                for row in post_rows(Post.objects.filter(pk__in=pks))}
+        return [rows[pk] for pk in pks if pk in rows]
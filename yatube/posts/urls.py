@@ -1,21 +1,46 @@
 from django.urls import path
 
-from . import views
+from core.ratelimit import throttle
+from . import feeds, live, views
 
 app_name = 'posts'
 
+# Подписки в этом проекте переключаются GET-запросами.
+throttle_follow = throttle('user:30/m', 'user:300/d', 'ip:120/m',
+                           methods=('GET',))
+
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
+    path('trending/<slug:window>/', views.trending, name='trending'),
     path('group/<slug:slug>/', views.group_posts, name='posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
-    path('create/', views.post_create, name='post_create'),
+    path('create/', throttle('user:5/m', 'user:100/d', 'ip:30/m')(
+        views.post_create), name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/',
-         views.add_comment, name='add_comment'),
+         throttle('user:10/m', 'user:500/d', 'ip:60/m')(views.add_comment),
+         name='add_comment'),
+    path('posts/<int:post_id>/react/',
+         throttle('user:30/m', 'ip:120/m')(views.post_react),
+         name='post_react'),
     path('follow/', views.follow_index, name='follow_index'),
     path('profile/<str:username>/follow/',
-         views.profile_follow, name='profile_follow'),
+         throttle_follow(views.profile_follow), name='profile_follow'),
     path('profile/<str:username>/unfollow/',
-         views.profile_unfollow, name='profile_unfollow')
+         throttle_follow(views.profile_unfollow),
+         name='profile_unfollow'),
+    path('notifications/', views.notifications, name='notifications'),
+    path('notifications/read/', views.notifications_read,
+         name='notifications_read'),
+    path('feed/<str:feed_type>/', feeds.index_feed, name='index_feed'),
+    path('group/<slug:slug>/feed/<str:feed_type>/',
+         feeds.group_feed, name='group_feed'),
+    path('profile/<str:username>/feed/<str:feed_type>/',
+         feeds.profile_feed, name='profile_feed'),
+    path('events/', live.index_events, name='index_events'),
+    path('follow/events/', live.follow_events, name='follow_events'),
+    path('posts/<int:post_id>/events/',
+         live.post_events, name='post_events'),
 ]
@@ -0,0 +1,184 @@
+"""Счётчик просмотров постов с буфером в памяти процесса.
+
+post_detail не пишет в базу на каждый GET: record_view прибавляет
+просмотр к словарю процесса. Когда в буфере набирается FLUSH_SIZE
+постов или с прошлого сброса прошло FLUSH_INTERVAL секунд, накопленное
+после коммита уходит фоновой задачей flush_views в базу: по одному
+UPDATE на каждое встретившееся приращение, а не на каждый пост, и
+строка истории PostViews за день. В процессе сервера start_flusher
+вдобавок сбрасывает буфер раз в FLUSH_INTERVAL, даже если просмотров
+больше нет, и при выходе. Падение процесса теряет только то, что
+накопилось с последнего сброса: не больше FLUSH_SIZE постов и
+FLUSH_INTERVAL секунд. У каждого процесса свой буфер.
+
+Повторный просмотр того же поста тем же посетителем в течение
+DEDUP_WINDOW секунд не считается: посетители хранятся в
+RotatingBloomFilter фиксированного размера (около 1 % ложных отказов).
+Поисковые роботы отсекаются по User-Agent.
+
+Дневную историю старше HISTORY_DAYS команда compact_views сворачивает
+в строки за месяц.
+"""
+import atexit
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import partial
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from core.bloom import RotatingBloomFilter
+from core.tasks import PRIORITY_LOW, schedule
+from .models import Post, PostViews
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 30
+FLUSH_SIZE = 1000
+DEDUP_WINDOW = 30 * 60
+DEDUP_CAPACITY = 100000
+HISTORY_DAYS = 31
+BOT_AGENTS = re.compile(
+    r'bot|crawl|spider|slurp|preview|curl|wget|python-requests', re.I)
+
+_lock = threading.Lock()
+_pending = Counter()
+_last_flush = time.monotonic()
+_visitors = RotatingBloomFilter(DEDUP_CAPACITY, DEDUP_WINDOW)
+_flusher = None
+
+
+def visitor(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return 'anon:{}:{}'.format(request.META.get('REMOTE_ADDR', ''),
+                               request.META.get('HTTP_USER_AGENT', ''))
+
+
+def _take():
+    global _last_flush
+    counts = dict(_pending)
+    _pending.clear()
+    _last_flush = time.monotonic()
+    return counts
+
+
+def record_view(request, post_id):
+    """Учитывает просмотр поста; False для повторов и роботов."""
+    if BOT_AGENTS.search(request.META.get('HTTP_USER_AGENT', '')):
+        return False
+    now = time.monotonic()
+    with _lock:
+        if not _visitors.add(f'{visitor(request)}:{post_id}', now):
+            return False
+        _pending[post_id] += 1
+        if (len(_pending) < FLUSH_SIZE
+                and now - _last_flush < FLUSH_INTERVAL):
+            return True
+        counts = _take()
+    # Ключи JSON-аргументов задачи — строки, поэтому передаём пары.
+    transaction.on_commit(partial(
+        schedule, flush_views, [list(counts.items())], priority=PRIORITY_LOW))
+    return True
+
+
+def pending(post_id):
+    """Просмотры поста, ещё не сброшенные этим процессом в базу."""
+    with _lock:
+        return _pending.get(post_id, 0)
+
+
+def flush():
+    """Сразу сбрасывает буфер процесса в базу."""
+    with _lock:
+        counts = _take()
+    if counts:
+        flush_views(counts)
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Просмотры не сброшены в базу')
+        finally:
+            close_old_connections()
+
+
+def start_flusher():
+    """Сбрасывает буфер процесса раз в FLUSH_INTERVAL и при выходе.
+
+    Вызывается из точки входа сервера (yatube/wsgi.py), а не при
+    импорте, чтобы тесты и команды manage.py не писали в базу в фоне.
+    """
+    global _flusher
+    with _lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(
+            target=_flush_periodically, name='yatube-views', daemon=True)
+    _flusher.start()
+    atexit.register(flush)
+
+
+def reset():
+    """Очищает буфер и память о посетителях; для тестов."""
+    global _visitors
+    with _lock:
+        _take()
+        _visitors = RotatingBloomFilter(DEDUP_CAPACITY, DEDUP_WINDOW)
+
+
+def flush_views(counts, day=None):
+    """Прибавляет просмотры {post_id: число} к постам и истории дня.
+
+    counts можно передать и списком пар (post_id, число).
+    """
+    counts = dict(counts)
+    day = day or timezone.localdate()
+    with transaction.atomic():
+        # Посты, удалённые или архивированные после просмотра, пропускаем.
+        existing = set(Post.objects.filter(pk__in=list(counts)).order_by()
+                       .values_list('pk', flat=True))
+        by_count = defaultdict(list)
+        for post_id, count in counts.items():
+            if post_id in existing:
+                by_count[count].append(post_id)
+        PostViews.objects.bulk_create(
+            [PostViews(post_id=post_id, day=day) for post_id in existing],
+            ignore_conflicts=True)
+        for count, post_ids in by_count.items():
+            Post.objects.filter(pk__in=post_ids).update(
+                views=F('views') + count)
+            PostViews.objects.filter(post_id__in=post_ids, day=day).update(
+                views=F('views') + count)
+
+
+@transaction.atomic
+def compact_history(today=None, keep_days=HISTORY_DAYS):
+    """Сворачивает дневную историю старше keep_days в строки за месяц.
+
+    Строка за месяц датируется его первым днём. Месяц, в который
+    попадает граница, не трогается, а уже свёрнутые месяцы сворачиваются
+    сами в себя. Возвращает число удалённых и созданных строк.
+    """
+    today = today or timezone.localdate()
+    before = (today - timedelta(days=keep_days)).replace(day=1)
+    old = PostViews.objects.filter(day__lt=before)
+    months = list(old.annotate(month=TruncMonth('day')).order_by()
+                  .values_list('post_id', 'month')
+                  .annotate(total=Sum('views')))
+    deleted, _ = old.delete()
+    PostViews.objects.bulk_create([
+        PostViews(post_id=post_id, day=month, views=total)
+        for post_id, month, total in months
+    ])
+    return deleted, len(months)
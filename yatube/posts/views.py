@@ -1,25 +1,62 @@
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
+from django.views.decorators.vary import vary_on_cookie
 
+from core.paginator import QuerySetChain
+from core.tasks import enqueue
+from core.thumbnails import prefetch_thumbnails
+from .caching import (
+    COMMENTS_TIMEOUT, PROFILE_HEADER_TIMEOUT, comments_key,
+    invalidate_profile_header, profile_header_key,
+)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
+from .images import process_post_image
+from .live import announce_comment, publish_post
+from .models import (
+    ArchivedPost, Group, Post, User, Follow, Notification,
+)
+from .notifications import mark_read, notify_comment, notify_follow
+from .reactions import (
+    EMOJI, attach_reactions, react, reaction_buttons, with_reactions,
+)
+from .rows import FeedRows
+from .trending import (
+    DEFAULT_WINDOW, WINDOW_TITLES, TrendingRows, get_top, record_comment,
+)
+from .viewcount import pending, record_view
 
 
 POSTS_PER_PAGE = 10
+NOTIFICATIONS_PER_PAGE = 20
+# должно совпадать с тегом {% thumbnail %} в шаблонах ленты
+FEED_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
 
 
 def paginator(request, queryset):
     posts_per_page = Paginator(queryset, POSTS_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = posts_per_page.get_page(page_number)
+    attach_reactions(page_obj.object_list)
+    geometry, options = FEED_THUMBNAIL
+    prefetch_thumbnails((post.image for post in page_obj), geometry,
+                        **options)
     return page_obj
 
 
+# Шапка страницы своя у каждого пользователя (счётчик уведомлений),
+# поэтому кэш различает посетителей по cookie сессии.
 @cache_page(20, key_prefix='index_page')
+@vary_on_cookie
 def index(request):
-    post_list = Post.objects.select_related('author').all()
+    post_list = FeedRows(Post.objects.all())
     page_obj = paginator(request, post_list)
     context = {
         'page_obj': page_obj,
@@ -27,10 +64,28 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+def trending(request, window=DEFAULT_WINDOW):
+    """Самые обсуждаемые посты окна по готовому списку compact_trending."""
+    if window not in WINDOW_TITLES:
+        raise Http404('Неизвестное окно')
+    page_obj = paginator(request, TrendingRows(get_top(window)))
+    context = {
+        'page_obj': page_obj,
+        'window': window,
+        'windows': WINDOW_TITLES.items(),
+        'trending': True,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    # после свежих постов лента продолжается в архив
+    post_list = QuerySetChain(
+        FeedRows(group.posts.all()),
+        FeedRows(group.archived_posts.all()),
+    )
     page_obj = paginator(request, post_list)
     context = {
         'group': group,
@@ -39,34 +94,112 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+def count_of(queryset, field, outer='pk'):
+    """Подзапрос с числом строк queryset, у которых field равно outer."""
+    counted = queryset.filter(**{field: OuterRef(outer)}).order_by().values(
+        field).annotate(count=Count('*')).values('count')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    post_list = user.posts.all()
+    """Профиль за два запроса: автор со счётчиками и страница постов."""
+    header_key = profile_header_key(username)
+    header = cache.get(header_key)
+    authors = User.objects.annotate(
+        posts_count=count_of(Post.objects, 'author'),
+        archived_posts_count=count_of(ArchivedPost.objects, 'author'),
+    )
+    if header is None:
+        authors = authors.annotate(
+            followers_count=count_of(Follow.objects, 'author'),
+            following_count=count_of(Follow.objects, 'user'),
+        )
+    if request.user.is_authenticated:
+        authors = authors.annotate(is_followed=Exists(Follow.objects.filter(
+            user=request.user, author=OuterRef('pk'))))
+    author = get_object_or_404(authors, username=username)
+    post_list = QuerySetChain(
+        FeedRows(author.posts.all()),
+        FeedRows(author.archived_posts.all()),
+        counts=[author.posts_count, author.archived_posts_count],
+    )
     page_obj = paginator(request, post_list)
+    if header is None:
+        header = render_to_string('posts/includes/profile_header.html', {
+            'author': author,
+            'total_posts': author.posts_count + author.archived_posts_count,
+        })
+        cache.set(header_key, header, PROFILE_HEADER_TIMEOUT)
     context = {
         'page_obj': page_obj,
-        'author_name': user,
+        'author_name': author,
+        'header': header,
+        'following': getattr(author, 'is_followed', False),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def with_author_posts_count(queryset):
+    return queryset.select_related('author', 'group').annotate(
+        author_posts_count=(
+            count_of(Post.objects, 'author', 'author_id')
+            + count_of(ArchivedPost.objects, 'author', 'author_id')
+        ),
+    )
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    """Пост за постоянное число запросов при любом числе комментариев."""
+    post = with_reactions(with_author_posts_count(Post.objects),
+                          request.user).filter(pk=post_id).first()
+    is_archived = post is None
+    if is_archived:
+        post = get_object_or_404(
+            with_author_posts_count(ArchivedPost.objects), pk=post_id)
+        # Реакции остаются за архивным постом, но ставить их нельзя.
+        attach_reactions([post])
+    views = post.views
+    if not is_archived:
+        record_view(request, post.pk)
+        views += pending(post.pk)
+    comments_html = cache.get(comments_key(post.pk))
+    if comments_html is None:
+        comments_html = render_to_string(
+            'posts/includes/comment_list.html',
+            {'comments': post.comments.select_related('author')})
+        cache.set(comments_key(post.pk), comments_html, COMMENTS_TIMEOUT)
     form = CommentForm(instance=None)
     context = {
         'post': post,
         'form': form,
+        'is_archived': is_archived,
+        'comments_html': comments_html,
+        'reactions': [] if is_archived else reaction_buttons(post),
+        'views': views,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@login_required
+@require_POST
+def post_react(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    kind = request.POST.get('kind')
+    if kind not in EMOJI:
+        return HttpResponseBadRequest('Неизвестная реакция')
+    react(request.user, post.pk, kind)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        enqueue(publish_post, post.pk)
+        invalidate_profile_header(request.user.username)
         return redirect('posts:profile', request.user.username)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -82,7 +215,11 @@ def post_edit(request, post_id):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
+        if 'image' in form.changed_data:
+            post.clear_image_meta()
         post.save()
+        if 'image' in form.changed_data and post.image:
+            enqueue(process_post_image, post.pk)
         return redirect('posts:post_detail', post.pk)
     form = PostForm(instance=post)
     context = {
@@ -102,12 +239,16 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        record_comment(post.pk)
+        enqueue(notify_comment, comment.pk)
+        announce_comment(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = FeedRows(
+        Post.objects.filter(author__following__user=request.user))
     page_obj = paginator(request, post_list)
     context = {
         'page_obj': page_obj, }
@@ -118,9 +259,12 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(
+        _, created = Follow.objects.get_or_create(
             user=request.user,
             author=author)
+        invalidate_profile_header(author.username, request.user.username)
+        if created:
+            enqueue(notify_follow, request.user.pk, author.pk)
     return redirect("posts:profile", username=username)
 
 
@@ -129,4 +273,22 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     follower = get_object_or_404(User, username=request.user.username)
     Follow.objects.filter(user=follower, author=author).delete()
+    invalidate_profile_header(author.username, follower.username)
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def notifications(request):
+    inbox = Notification.objects.filter(
+        recipient=request.user).select_related('actor', 'post')
+    page_obj = Paginator(inbox, NOTIFICATIONS_PER_PAGE).get_page(
+        request.GET.get('page'))
+    return render(request, 'posts/notifications.html',
+                  {'page_obj': page_obj})
+
+
+@login_required
+@require_POST
+def notifications_read(request):
+    mark_read(request.user.pk)
+    return redirect('posts:notifications')
@@ -0,0 +1,40 @@
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from posts import moderation
+from posts.admin import ModerationAdminMixin
+
+User = get_user_model()
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(ModerationAdminMixin, BaseUserAdmin):
+    actions = ('delete_in_background',)
+
+    def has_delete_permission(self, request, obj=None):
+        # Обычное удаление собирает весь каскад постов и комментариев
+        # в памяти и удаляет его одной транзакцией; пользователей
+        # удаляет только фоновое действие.
+        return False
+
+    def has_delete_in_background_permission(self, request):
+        return super().has_delete_permission(request)
+
+    def delete_in_background(self, request, queryset):
+        user_ids = list(queryset.exclude(pk=request.user.pk)
+                        .values_list('pk', flat=True))
+        if not user_ids:
+            self.message_user(request, 'Себя удалить нельзя.',
+                              messages.ERROR)
+            return
+        # Войти и писать они перестают сразу, содержимое уходит в фоне.
+        User.objects.filter(pk__in=user_ids).update(is_active=False)
+        self.start_moderation(
+            request, f'Удаление пользователей ({len(user_ids)})',
+            moderation.delete_users, user_ids)
+    delete_in_background.short_description = (
+        'Удалить пользователей со всеми записями')
+    delete_in_background.allowed_permissions = ('delete_in_background',)
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        from django.contrib.auth.password_validation import (
+            get_default_password_validators,
+        )
+        # Список частых паролей читается с диска при старте воркера,
+        # а не на первой регистрации.
+        get_default_password_validators()
@@ -0,0 +1,164 @@
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+VERIFIED_CACHE_SIZE = 1024
+VERIFIED_CACHE_TTL = 5 * 60
+
+_slots = None
+_slots_lock = threading.Lock()
+_verified = OrderedDict()
+_verified_lock = threading.Lock()
+
+
+def hashing_slots():
+    """Семафор на число одновременных хэширований в процессе.
+
+    scrypt и pbkdf2 отпускают GIL, поэтому без ограничения волна входов
+    занимает все ядра и обычные страницы ждут процессор.
+    """
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(
+                settings.PASSWORD_HASHING_SLOTS)
+        return _slots
+
+
+def _verified_key(password, encoded):
+    # В памяти хранится не пароль и не быстрый хэш от него, а HMAC на
+    # секретном ключе.
+    return hmac.new(settings.SECRET_KEY.encode(),
+                    f'{encoded}\0{password}'.encode(),
+                    hashlib.sha256).digest()
+
+
+def recently_verified(password, encoded):
+    key = _verified_key(password, encoded)
+    with _verified_lock:
+        verified_at = _verified.get(key)
+        if verified_at is None:
+            return False
+        if time.monotonic() - verified_at > VERIFIED_CACHE_TTL:
+            del _verified[key]
+            return False
+        return True
+
+
+def remember_verified(password, encoded):
+    key = _verified_key(password, encoded)
+    with _verified_lock:
+        _verified[key] = time.monotonic()
+        _verified.move_to_end(key)
+        while len(_verified) > VERIFIED_CACHE_SIZE:
+            _verified.popitem(last=False)
+
+
+def forget_verified():
+    with _verified_lock:
+        _verified.clear()
+
+
+class BudgetedHasherMixin:
+    """Хэширование в пределах PASSWORD_HASHING_SLOTS и кэш успешных проверок.
+
+    Кэшируются только совпадения: перебор паролей всегда платит полную
+    цену хэша, а повторный вход с тем же паролем в течение
+    VERIFIED_CACHE_TTL её не платит.
+    """
+
+    def encode(self, password, salt, *args, **kwargs):
+        with hashing_slots():
+            return super().encode(password, salt, *args, **kwargs)
+
+    def verify(self, password, encoded):
+        if recently_verified(password, encoded):
+            return True
+        verified = super().verify(password, encoded)
+        if verified:
+            remember_verified(password, encoded)
+        return verified
+
+
+class BaseScryptPasswordHasher(hashers.BasePasswordHasher):
+    """scrypt: стоимость подбора определяется памятью, а не только CPU.
+
+    Формат совпадает с ScryptPasswordHasher из Django 4.0. Параметры
+    меняются подклассом; хэши со старыми параметрами пересчитываются при
+    следующем входе.
+    """
+
+    algorithm = 'scrypt'
+    work_factor = 2 ** 14
+    block_size = 8
+    parallelism = 1
+    maxmem = 0
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            maxmem=self.maxmem, dklen=64)
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return f'{self.algorithm}${n}${salt}${r}${p}${hash_}'
+
+    def decode(self, encoded):
+        algorithm, n, salt, r, p, hash_ = encoded.split('$', 5)
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(n),
+            'salt': salt,
+            'block_size': int(r),
+            'parallelism': int(p),
+            'hash': hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password, decoded['salt'], decoded['work_factor'],
+            decoded['block_size'], decoded['parallelism'])
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), decoded['algorithm']),
+            (_('work factor'), decoded['work_factor']),
+            (_('block size'), decoded['block_size']),
+            (_('parallelism'), decoded['parallelism']),
+            (_('salt'), hashers.mask_hash(decoded['salt'])),
+            (_('hash'), hashers.mask_hash(decoded['hash'])),
+        ])
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (decoded['work_factor'] != self.work_factor
+                or decoded['block_size'] != self.block_size
+                or decoded['parallelism'] != self.parallelism)
+
+    def harden_runtime(self, password, encoded):
+        # Время scrypt задаётся параметрами хэша, добирать нечего.
+        pass
+
+
+class ScryptPasswordHasher(BudgetedHasherMixin, BaseScryptPasswordHasher):
+    pass
+
+
+class PBKDF2PasswordHasher(BudgetedHasherMixin,
+                           hashers.PBKDF2PasswordHasher):
+    """PBKDF2 из Django для проверки старых хэшей в том же бюджете."""
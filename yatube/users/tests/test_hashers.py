@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+
+from users import hashers
+from users.validators import CommonPasswordValidator
+
+User = get_user_model()
+
+PASSWORD = 'sunny-Octopus-42'
+
+
+class ScryptHasherTests(TestCase):
+    def setUp(self):
+        hashers.forget_verified()
+
+    def test_make_and_check(self):
+        """Новые пароли хэшируются scrypt и проверяются."""
+        encoded = make_password(PASSWORD)
+        self.assertTrue(encoded.startswith('scrypt$16384$'))
+        self.assertTrue(check_password(PASSWORD, encoded))
+        self.assertFalse(check_password('wrong', encoded))
+
+    def test_pbkdf2_rehashed_on_login(self):
+        """Старый хэш pbkdf2 заменяется на scrypt при входе."""
+        user = User.objects.create(
+            username='test-username',
+            password=make_password(PASSWORD, hasher='pbkdf2_sha256'),
+        )
+        self.assertTrue(self.client.login(username='test-username',
+                                          password=PASSWORD))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+    def test_changed_parameters_need_update(self):
+        """Хэш со старыми параметрами помечается на пересчёт."""
+        hasher = hashers.ScryptPasswordHasher()
+        encoded = hasher.encode(PASSWORD, 'salt', n=2 ** 10)
+        self.assertTrue(hasher.must_update(encoded))
+        self.assertFalse(hasher.must_update(hasher.encode(PASSWORD, 'salt')))
+
+    def test_positive_results_cached(self):
+        """Повторная проверка верного пароля не хэширует заново."""
+        hasher = hashers.ScryptPasswordHasher()
+        encoded = hasher.encode(PASSWORD, 'salt')
+        self.assertTrue(hasher.verify(PASSWORD, encoded))
+        with mock.patch('hashlib.scrypt') as scrypt:
+            self.assertTrue(hasher.verify(PASSWORD, encoded))
+            scrypt.assert_not_called()
+
+    def test_negative_results_not_cached(self):
+        """Неверный пароль каждый раз проверяется полностью."""
+        hasher = hashers.ScryptPasswordHasher()
+        encoded = hasher.encode(PASSWORD, 'salt')
+        self.assertFalse(hasher.verify('wrong', encoded))
+        with mock.patch.object(hashers.BaseScryptPasswordHasher, 'encode',
+                               return_value='') as encode:
+            self.assertFalse(hasher.verify('wrong', encoded))
+            encode.assert_called_once()
+
+    @override_settings(PASSWORD_HASHING_SLOTS=1)
+    def test_hashing_slots(self):
+        """Хэширование идёт в пределах семафора процесса."""
+        with mock.patch.object(hashers, '_slots', None):
+            slots = hashers.hashing_slots()
+            self.assertTrue(slots.acquire(blocking=False))
+            self.assertFalse(slots.acquire(blocking=False))
+            slots.release()
+
+
+class CommonPasswordValidatorTests(TestCase):
+    def test_list_shared(self):
+        """Список частых паролей загружается один раз."""
+        first = CommonPasswordValidator()
+        second = CommonPasswordValidator()
+        self.assertIs(first.passwords, second.passwords)
+        self.assertIsInstance(first.passwords, frozenset)
+        self.assertIn('password', first.passwords)
@@ -1,12 +1,17 @@
 from django.contrib.auth.views import PasswordResetView, LoginView, LogoutView
 from django.urls import path
 
+from core.ratelimit import throttle
 from . import views
 
 app_name = 'users'
 
 urlpatterns = [
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path(
+        'signup/',
+        throttle('ip:5/m', 'ip:50/d')(views.SignUp.as_view()),
+        name='signup'
+    ),
     path(
         'logout/',
         LogoutView.as_view(template_name='users/logged_out.html'),
@@ -14,8 +19,13 @@ urlpatterns = [
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        throttle('ip:10/m', 'ip:200/d')(
+            LoginView.as_view(template_name='users/login.html')),
         name='login'
     ),
-    path('password_reset/', PasswordResetView.as_view(), name='reset')
+    path(
+        'password_reset/',
+        throttle('ip:5/m', 'ip:50/d')(PasswordResetView.as_view()),
+        name='reset'
+    )
 ]
@@ -0,0 +1,29 @@
+import gzip
+from functools import lru_cache
+
+from django.contrib.auth import password_validation
+
+
+@lru_cache(maxsize=None)
+def load_common_passwords(path):
+    """Читает список частых паролей один раз на процесс."""
+    try:
+        with gzip.open(path, 'rt') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        with open(path) as f:
+            lines = f.readlines()
+    return frozenset(line.strip() for line in lines)
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    """CommonPasswordValidator со списком, общим для всех экземпляров.
+
+    Список загружается в UsersConfig.ready(), а не при первой
+    регистрации, и хранится в frozenset.
+    """
+
+    def __init__(self, password_list_path=(
+            password_validation.CommonPasswordValidator
+            .DEFAULT_PASSWORD_LIST_PATH)):
+        self.passwords = load_common_passwords(str(password_list_path))
@@ -0,0 +1,18 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 has no native ASGI support, so the WSGI application is run
+by core.asgi.ASGIHandler in a bounded thread pool; server-sent event
+streams are handed over to the event loop. Live updates of feeds and
+comments are only enabled for requests served this way. Run it with
+any ASGI server, for example ``uvicorn yatube.asgi:application``.
+"""
+
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+from core.asgi import ASGIHandler  # noqa: E402
+from yatube.wsgi import application as wsgi_application  # noqa: E402
+
+application = ASGIHandler(wsgi_application)
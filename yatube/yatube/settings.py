@@ -73,12 +73,17 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'posts.context_processors.notifications',
+                'posts.context_processors.live_updates',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# потоки, в которых yatube.asgi выполняет Django; потоки событий (SSE)
+# их не занимают, их отдаёт event loop
+ASGI_THREADS = 8
 
 
 # Database
@@ -103,13 +108,21 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'users.validators.CommonPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
     },
 ]
 
+# scrypt для новых паролей; старые pbkdf2 пересчитываются при входе
+PASSWORD_HASHERS = [
+    'users.hashers.ScryptPasswordHasher',
+    'users.hashers.PBKDF2PasswordHasher',
+]
+# сколько паролей процесс хэширует одновременно
+PASSWORD_HASHING_SLOTS = 2
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -132,23 +145,78 @@ STATIC_URL = '/static/'
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
 STATICFILES_DIRS = [STATIC_DIR]
 STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
+if not DEBUG:
+    # имена с хешем и заранее сжатые .gz/.br копии после collectstatic
+    STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# загрузки крупнее мегабайта пишутся во временный файл частями
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+# статику и медиа отдаёт само приложение (core.fileserver), без nginx
+SERVE_FILES = False
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-#  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма складываются в очередь (core.mail) и уходят в фоне через
+# MAIL_QUEUE_BACKEND, по одному соединению на пачку
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+MAIL_QUEUE_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# вне режима отладки фоновые задачи выполняют отдельные процессы
+# manage.py runworkers (см. TASKS_ALWAYS_EAGER): сброс кэша лент и
+# прогресс модерации из них веб-процесс увидит только в общем кэше
+if DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(BASE_DIR, 'var', 'cache'),
+        }
+    }
+
+# небольшие сессии живут в подписанной cookie, крупные — в cached_db
+SESSION_ENGINE = 'core.sessions'
+
+# ограничение частоты записи (core.ratelimit): счётчики в общем кэше
+RATELIMIT_ENABLE = True
+RATELIMIT_CACHE = 'default'
+
+# метаданные миниатюр sorl хранятся в отдельном файле, а не в основной базе;
+# var/ не отдаётся наружу, в отличие от MEDIA_ROOT
+THUMBNAIL_KVSTORE = 'core.thumbnails.SQLiteKVStore'
+THUMBNAIL_KVSTORE_PATH = os.path.join(BASE_DIR, 'var', 'thumbnails.sqlite3')
+
+# pub/sub для живого обновления лент и комментариев (server-sent events);
+# новые посты рассылает фоновая задача, поэтому вне режима отладки
+# нужен брокер, общий с воркерами runworkers
+EVENTS_BROKER = 'core.events.LocalBroker'
+
+# функция text -> HTML для текста постов, вызывается при сохранении
+POSTS_TEXT_RENDERER = 'posts.rendering.default_renderer'
+
+# посты старше этого срока manage.py archive_posts переносит в архив
+POSTS_ARCHIVE_AFTER_DAYS = 365
+
+# тесты пишут загрузки, миниатюры и письма во временный каталог
+TEST_RUNNER = 'core.testrunner.TempMediaTestRunner'
+
+# адрес сайта для ссылок в письмах, которые уходят не из запроса
+SITE_URL = 'http://localhost:8000'
+
+# фоновые задачи: в режиме отладки выполняются сразу, в запросе;
+# иначе ложатся в таблицу core.Job и их выполняет manage.py runworkers
+# в TASKS_WORKERS процессах. Кэш в этом режиме общий с воркерами (CACHES).
+TASKS_ALWAYS_EAGER = DEBUG
+TASKS_WORKERS = 2
@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from posts.viewcount import start_flusher  # noqa: E402
+
+start_flusher()
+
+if settings.SERVE_FILES:
+    from core.fileserver import FileServer
+
+    application = FileServer(application)